@@ -0,0 +1,188 @@
+""" CPU 추론 설정(replica 수, 스레드 수, 배치 크기)을 측정해 server.py 설정 파일을 만드는 도구
+
+모델을 한 번 불러온 뒤 (replica 수 x 스레드 수 x interop 스레드 수 x 배치 크기) 조합마다
+server.py --replicas 와 같은 방식으로 프로세스를 fork하고 CPU 코어를 나누어 고정한 다음,
+샘플 문장을 배치 단위로 번역하며 처리량(문장/초)과 배치 지연 시간의 p95를 측정합니다.
+처리량이 가장 높은 조합(--max_p95_ms를 지정하면 p95가 그 이하인 조합 중에서)을 server.py --config 로 읽는 JSON 파일로 저장합니다.
+fork와 CPU 고정을 사용하므로 리눅스에서 torch backend로 CPU를 사용할 때만 실행할 수 있습니다.
+
+사용 예
+    uv run autotune.py -m ./models/BlueT --replicas 1 2 4 --batch 4 8 16 -o ./autotune.json
+    uv run server.py --config ./autotune.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import statistics
+import sys
+import threading
+import time
+import traceback
+
+from engine import load_engine, load_tokenizer, set_num_threads, PRECISIONS
+from prefork import check_supported, split_cpus
+
+MAX_INPUT_LEN = 255  # 한 라인당 최대 토큰 수
+DEFAULT_SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'data', 'samples.txt')
+TIMEOUT = 3600  # 한 조합의 측정을 기다리는 최대 시간(초)
+
+
+def read_sample(path, count):
+    """프롬프트가 붙은 샘플 문장을 한 줄에 하나씩 읽어 count개가 되도록 반복합니다."""
+    with open(path, encoding='utf-8') as f:
+        sents = [line.strip() for line in f if line.strip()]
+    if not sents:
+        raise ValueError(f"{path}에 문장이 없습니다.")
+    return [sents[i % len(sents)] for i in range(count)]
+
+
+def _run_replica(engine, sources, batch, cpus, threads, interop_threads, barrier, results):
+    """fork한 프로세스에서 CPU 코어를 고정하고 워밍업한 뒤, 모든 replica가 준비되면 함께 번역을 시작합니다."""
+    try:
+        os.sched_setaffinity(0, cpus)
+        set_num_threads(threads, interop_threads)
+        engine.translate(sources[:batch])  # 워밍업
+        barrier.wait()
+        latencies = []
+        for i in range(0, len(sources), batch):
+            start = time.perf_counter()
+            engine.translate(sources[i:i + batch])
+            latencies.append(time.perf_counter() - start)
+        results.put(latencies)
+    except BaseException:
+        traceback.print_exc()
+        barrier.abort()
+        results.put(None)
+
+
+def measure(engine, sources, replicas, threads, interop_threads, batch, cpus):
+    """
+    replicas개의 프로세스가 sources를 나누어 batch 문장씩 번역하는 데 걸린 시간으로
+    (처리량(문장/초), 배치 지연 시간 p95(초))를 반환합니다.
+    """
+    context = multiprocessing.get_context('fork')
+    barrier = context.Barrier(replicas + 1)
+    results = context.Queue()
+    processes = []
+    for index, group in enumerate(split_cpus(replicas, cpus)):
+        process = context.Process(target=_run_replica, daemon=True,
+                                  args=(engine, sources[index::replicas], batch, group, threads or len(group),
+                                        interop_threads, barrier, results))
+        process.start()
+        processes.append(process)
+    try:
+        barrier.wait(timeout=TIMEOUT)
+        start = time.perf_counter()
+        latencies = []
+        for _ in processes:
+            replica_latencies = results.get(timeout=TIMEOUT)
+            if replica_latencies is None:
+                raise RuntimeError("replica에서 오류가 발생했습니다.")
+            latencies.extend(replica_latencies)
+        elapsed = time.perf_counter() - start
+    except (threading.BrokenBarrierError, queue.Empty) as e:
+        raise RuntimeError(f"측정이 끝나지 않았습니다: {type(e).__name__}")
+    finally:
+        for process in processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+    p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+    return len(sources) / elapsed, p95
+
+
+def candidates(args, cpus):
+    """측정할 (replica 수, replica당 스레드 수, interop 스레드 수, 배치 크기) 조합. 코어보다 많은 스레드를 쓰는 조합은 건너뜁니다."""
+    combos = []
+    for replicas in args.replicas:
+        if replicas > len(cpus):
+            print(f"replica {replicas}개는 CPU 코어 {len(cpus)}개보다 많아 건너뜁니다.")
+            continue
+        for threads in args.torch_threads:
+            threads = threads or len(cpus) // replicas
+            if replicas * threads > len(cpus):
+                print(f"replica {replicas}개 x 스레드 {threads}개는 CPU 코어 {len(cpus)}개보다 많아 건너뜁니다.")
+                continue
+            for interop_threads in args.interop_threads:
+                for batch in args.batch:
+                    combo = (replicas, threads, interop_threads, batch)
+                    if combo not in combos:
+                        combos.append(combo)
+    return combos
+
+
+def recommend(results, max_p95_ms=0):
+    """
+    처리량이 가장 높은 측정 결과를 반환합니다.
+    max_p95_ms를 지정하면 p95가 그 이하인 결과 중에서 고르고, 만족하는 결과가 없으면 p95가 가장 낮은 결과를 반환합니다.
+    """
+    within = [r for r in results if not max_p95_ms or r['p95_ms'] <= max_p95_ms]
+    if not within:
+        return min(results, key=lambda r: r['p95_ms'])
+    return max(within, key=lambda r: r['sentences_per_sec'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CPU 추론 설정 자동 조정')
+    parser.add_argument('-m', '--model', type=str, default='./models/BlueT')
+    parser.add_argument('--precision', type=str, default='fp32', choices=PRECISIONS)
+    parser.add_argument('-i', '--sample', type=str, default=DEFAULT_SAMPLE,
+                        help='프롬프트가 붙은 샘플 문장 파일 (한 줄에 한 문장)')
+    parser.add_argument('-n', '--sentences', type=int, default=256, help='조합마다 번역할 문장 수')
+    parser.add_argument('--replicas', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--torch_threads', type=int, nargs='+', default=[0],
+                        help='replica당 스레드 수. 0이면 replica에 배정된 CPU 코어 수')
+    parser.add_argument('--interop_threads', type=int, nargs='+', default=[0], help='0이면 torch 기본값')
+    parser.add_argument('-b', '--batch', type=int, nargs='+', default=[4, 8, 16, 32])
+    parser.add_argument('--max_p95_ms', type=float, default=0,
+                        help='배치 지연 시간 p95 상한(ms). 지정하면 이 조건을 만족하는 조합 중에서 처리량이 가장 높은 조합을 추천')
+    parser.add_argument('-o', '--output', type=str, default='./autotune.json', help='server.py --config 로 읽을 설정 파일')
+    args = parser.parse_args()
+
+    check_supported()
+    cpus = sorted(os.sched_getaffinity(0))
+    combos = candidates(args, cpus)
+    if not combos:
+        sys.exit("측정할 조합이 없습니다.")
+    sources = read_sample(args.sample, args.sentences)
+
+    # 부모가 OpenMP 스레드를 만들지 않아야 fork한 프로세스에서 스레드 수를 다시 정할 수 있음 (server.py --replicas 와 같음)
+    set_num_threads(1)
+    tokenizer = load_tokenizer(args.model)
+    engine = load_engine(args.model, tokenizer, max_batch=max(args.batch), max_length=MAX_INPUT_LEN,
+                         precision=args.precision)
+    if engine.device != 'cpu':
+        sys.exit("autotune은 CPU에서만 사용할 수 있습니다.")
+
+    print(f"CPU 코어 {len(cpus)}개, 문장 {len(sources)}개, 조합 {len(combos)}개")
+    print(f"{'replicas':>8} {'threads':>7} {'interop':>7} {'batch':>5} {'문장/초':>10} {'p95':>10}")
+    results = []
+    for replicas, threads, interop_threads, batch in combos:
+        try:
+            throughput, p95 = measure(engine, sources, replicas, threads, interop_threads, batch, cpus)
+        except RuntimeError as e:
+            print(f"{replicas:>8} {threads:>7} {interop_threads:>7} {batch:>5} 실패 - {e}")
+            continue
+        results.append({'replicas': replicas, 'torch_threads': threads, 'interop_threads': interop_threads,
+                        'batch': batch, 'sentences_per_sec': round(throughput, 2), 'p95_ms': round(p95 * 1000, 1)})
+        print(f"{replicas:>8} {threads:>7} {interop_threads:>7} {batch:>5} {throughput:>10.1f} {p95 * 1000:>8.1f}ms")
+    if not results:
+        sys.exit("측정에 성공한 조합이 없습니다.")
+
+    best = recommend(results, args.max_p95_ms)
+    config = {key: best[key] for key in ('replicas', 'torch_threads', 'interop_threads', 'batch')}
+    config['precision'] = args.precision
+    # server.py는 'autotune' 항목을 읽지 않음, 측정 조건과 결과 기록용
+    config['autotune'] = {'model': args.model, 'cpus': len(cpus),
+                          'sentences': len(sources), 'max_p95_ms': args.max_p95_ms, 'results': results}
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+    print(f"추천 설정: replica {best['replicas']}개, torch 스레드 {best['torch_threads']}개, interop 스레드 {best['interop_threads']}개, "
+          f"배치 {best['batch']} - {best['sentences_per_sec']:.1f} 문장/초, p95 {best['p95_ms']:.1f}ms")
+    print(f"{args.output}에 저장했습니다. server.py --config {args.output} 로 사용합니다.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+""" 번역 엔진 지연 시간 비교 벤치마크
+
+이전 방식(Dataset.from_generator + pipeline + KeyDataset)과 GenerateEngine(토크나이저 + model.generate)의
+배치당 지연 시간을 작은 무작위 T5 모델로 비교합니다. 네트워크 없이 실행됩니다.
+
+사용 예
+    uv run benchmarks/bench_engine.py --batch 1 8 32 --repeat 5
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import GenerateEngine  # noqa: E402
+from tiny_model import make_model, make_tokenizer  # noqa: E402
+
+SENTENCES = [
+    "E2K, FRM: This model is an English-Korean translation model.",
+    "E2K: Yeah.",
+    "E2K: The quick brown fox jumps over the lazy dog near the river bank.",
+    "K2E: Thank you.",
+]
+
+
+def pipeline_translate(model, tokenizer, max_length):
+    """이전 server.py의 translate_sents와 같은 방식"""
+    from datasets import Dataset
+    from transformers import pipeline
+    from transformers.pipelines.pt_utils import KeyDataset
+
+    translator = pipeline("translation", model=model, tokenizer=tokenizer, max_length=max_length)
+
+    def translate(sources):
+        def generator():
+            for source in sources:
+                yield {'src': source.strip()}
+
+        if len(sources) > 1:
+            dataset = Dataset.from_generator(generator)
+            targets = translator(KeyDataset(dataset, 'src'), batch_size=len(sources))
+            targets = [t[0] for t in targets]
+        else:
+            targets = translator(sources, batch_size=len(sources))
+        return [t["translation_text"] for t in targets]
+
+    return translate
+
+
+def measure(fn, sources, repeat):
+    fn(sources)  # 워밍업
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(sources)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='번역 엔진 지연 시간 비교')
+    parser.add_argument('--batch', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--max_length', type=int, default=32, help='생성할 최대 토큰 수')
+    args = parser.parse_args()
+
+    tokenizer = make_tokenizer()
+    model = make_model(tokenizer)
+    engines = {'generate': GenerateEngine(model, tokenizer, max_batch=max(args.batch), max_length=args.max_length).translate}
+    try:
+        engines['pipeline+Dataset'] = pipeline_translate(model, tokenizer, args.max_length)
+    except ImportError as e:
+        print(f"이전 방식은 측정하지 않음: {e}")
+
+    print(f"{'batch':>6} " + ' '.join(f"{name:>18}" for name in engines))
+    for batch in args.batch:
+        sources = [SENTENCES[i % len(SENTENCES)] for i in range(batch)]
+        row = [measure(fn, sources, args.repeat) * 1000 for fn in engines.values()]
+        print(f"{batch:>6} " + ' '.join(f"{ms:>16.1f}ms" for ms in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+""" 대용량 /translate 요청이 처리되는 동안 작은 요청의 응답 지연 시간을 측정하는 벤치마크
+
+실행 중인 서버를 대상으로 먼저 작은 요청만 보내 기준 지연 시간을 재고,
+약 1MB 텍스트의 /translate 요청을 보내는 동안 다시 작은 요청의 지연 시간을 잽니다.
+대용량 요청과 작은 요청의 문장은 모두 실행마다 다르게 만들지만, 번역 메모리가 측정에 섞이지 않도록
+서버는 --tm_size 0 으로 (--tm_db 없이) 시작합니다.
+
+사용 예
+    uv run server.py --tm_size 0
+    uv run benchmarks/bench_event_loop.py --host http://127.0.0.1:5000 --size 1000000
+"""
+import argparse
+import itertools
+import statistics
+import threading
+import time
+import uuid
+
+import requests
+
+SAMPLE_LINES = [
+    "This model is an English-Korean translation model.",
+    "The server keeps answering other clients while a long document is translated.",
+    "Short lines and long paragraphs are mixed in real documents.",
+    "",
+]
+
+
+RUN_ID = uuid.uuid4().hex[:8]  # 같은 서버에서 다시 실행해도 문장이 겹치지 않도록 문장마다 붙임
+_probe_ids = itertools.count()
+
+
+def make_document(size):
+    """SAMPLE_LINES에 번호를 붙여 모든 문장이 다른 size자 문서를 만듭니다."""
+    lines = []
+    total = 0
+    i = 0
+    while total < size:
+        line = SAMPLE_LINES[i % len(SAMPLE_LINES)]
+        if line:
+            line = f"Line {i} of run {RUN_ID}: {line}"
+        lines.append(line)
+        total += len(line) + 1
+        i += 1
+    return '\n'.join(lines)[:size]
+
+
+def probe_text():
+    return f"Hello, this is probe {next(_probe_ids)} of run {RUN_ID}."
+
+
+def post(host, text, timeout=None):
+    data = {'q': text, 'sl': 'en', 'tl': 'ko', 'hn': 'Y'}
+    start = time.perf_counter()
+    response = requests.post(host + '/translate', json=data, timeout=timeout)
+    elapsed = time.perf_counter() - start
+    response.raise_for_status()
+    return elapsed
+
+
+def probe(host, count, interval, stop=None):
+    latencies = []
+    for _ in range(count):
+        if stop is not None and stop.is_set():
+            break
+        latencies.append(post(host, probe_text(), timeout=600))
+        time.sleep(interval)
+    return latencies
+
+
+def report(name, latencies):
+    if not latencies:
+        print(f"{name}: 측정값 없음")
+        return
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"{name}: n={len(latencies)} p50={statistics.median(latencies) * 1000:.1f}ms "
+          f"p95={p95 * 1000:.1f}ms max={latencies[-1] * 1000:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='대용량 요청 처리 중 작은 요청의 지연 시간 측정')
+    parser.add_argument('--host', type=str, default='http://127.0.0.1:5000')
+    parser.add_argument('--size', type=int, default=1000000, help='대용량 요청의 텍스트 길이(문자 수)')
+    parser.add_argument('--probes', type=int, default=20, help='작은 요청 횟수')
+    parser.add_argument('--interval', type=float, default=0.2, help='작은 요청 사이의 간격(초)')
+    args = parser.parse_args()
+
+    report('기준(대용량 요청 없음)', probe(args.host, args.probes, args.interval))
+
+    document = make_document(args.size)
+    done = threading.Event()
+    result = {}
+
+    def big_job():
+        try:
+            result['elapsed'] = post(args.host, document)
+        finally:
+            done.set()
+
+    worker = threading.Thread(target=big_job)
+    worker.start()
+    time.sleep(args.interval)
+    report(f'{len(document)}자 요청 처리 중', probe(args.host, args.probes, args.interval, stop=done))
+    worker.join()
+    if 'elapsed' in result:
+        print(f"대용량 요청 처리 시간: {result['elapsed']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
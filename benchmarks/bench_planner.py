@@ -0,0 +1,114 @@
+""" 문서 플래너의 배치 구성을 이전 방식(라인 묶음과 긴 라인을 따로 요청)과 비교하는 벤치마크
+
+번역 모델 대신 배치마다 고정 비용과 문장당 비용만큼 기다리는 함수를 BatchScheduler에 연결하고,
+긴 문단과 짧은 제목, 빈 라인이 번갈아 나오는 PDF 추출 텍스트를 두 방식으로 번역해
+스케줄러에 보낸 요청 수, 모델 배치 수와 평균 크기, 처리 시간을 출력합니다.
+
+사용 예
+    uv run benchmarks/bench_planner.py --lines 2000 --batch 8
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from planner import translate_document  # noqa: E402
+from scheduler import BatchScheduler  # noqa: E402
+from text_parser import SentenceParser  # noqa: E402
+from bench_text import make_prose  # noqa: E402
+
+MAX_INPUT_LEN = 255
+
+
+def make_pdf_lines(count, seed=0):
+    """긴 문단, 짧은 제목, 빈 라인이 섞인 라인 리스트"""
+    rnd = random.Random(seed)
+    lines = []
+    for i in range(count):
+        kind = rnd.random()
+        if kind < 0.4:
+            lines.append(make_prose(rnd.randint(300, 1200), seed=i))
+        elif kind < 0.8:
+            lines.append(f"Section {i}. Results and discussion")
+        else:
+            lines.append('')
+    return lines
+
+
+async def legacy_translate(lines, translate_fn, sent_parser, batch_size):
+    """긴 라인과 빈 라인에서 짧은 라인 묶음을 끊어 따로 요청하던 이전 방식"""
+    jobs = []
+    batch = []
+    for line in lines:
+        if len(line) > MAX_INPUT_LEN:
+            if batch:
+                jobs.append(asyncio.ensure_future(translate_fn(batch)))
+                batch = []
+            jobs.append(asyncio.ensure_future(translate_fn(sent_parser.parse(line))))
+        elif line.strip():
+            batch.append(line)
+            if len(batch) == batch_size:
+                jobs.append(asyncio.ensure_future(translate_fn(batch)))
+                batch = []
+        elif batch:
+            jobs.append(asyncio.ensure_future(translate_fn(batch)))
+            batch = []
+    if batch:
+        jobs.append(asyncio.ensure_future(translate_fn(batch)))
+    for job in jobs:
+        await job
+    return len(jobs)
+
+
+async def run(name, lines, args):
+    batch_sizes = []
+
+    def infer(sources):
+        batch_sizes.append(len(sources))
+        time.sleep(args.batch_ms / 1000 + args.sent_ms / 1000 * len(sources))
+        return sources
+
+    scheduler = BatchScheduler(infer, max_batch=args.batch, max_wait_ms=args.max_wait_ms)
+    scheduler.start()
+    requests = 0
+
+    async def translate_fn(sents):
+        nonlocal requests
+        requests += 1
+        return await scheduler.submit(sents)
+
+    start = time.perf_counter()
+    if name == 'planner':
+        async for _ in translate_document(lines, translate_fn, SentenceParser(), args.batch, max_len=MAX_INPUT_LEN):
+            pass
+    else:
+        await legacy_translate(lines, translate_fn, SentenceParser(), args.batch)
+    elapsed = time.perf_counter() - start
+    await scheduler.stop()
+
+    sentences = sum(batch_sizes)
+    print(f"{name:<8} 요청 {requests:>6}  배치 {len(batch_sizes):>6}  평균 배치 크기 {sentences / len(batch_sizes):5.2f}  "
+          f"가득 찬 배치 {sum(size == args.batch for size in batch_sizes) / len(batch_sizes):6.1%}  "
+          f"{elapsed:6.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='문서 플래너와 이전 방식의 배치 구성 비교')
+    parser.add_argument('--lines', type=int, default=2000, help='문서의 라인 수')
+    parser.add_argument('--batch', type=int, default=8)
+    parser.add_argument('--max_wait_ms', type=float, default=5.0)
+    parser.add_argument('--batch_ms', type=float, default=2.0, help='배치당 고정 비용(ms)')
+    parser.add_argument('--sent_ms', type=float, default=0.5, help='문장당 비용(ms)')
+    args = parser.parse_args()
+
+    lines = make_pdf_lines(args.lines)
+    for name in ('legacy', 'planner'):
+        asyncio.run(run(name, lines, args))
+
+
+if __name__ == "__main__":
+    main()
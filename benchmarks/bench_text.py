@@ -0,0 +1,211 @@
+""" 텍스트/자막 처리 마이크로 벤치마크
+
+번역 모델 없이 문장 분리, 자막 파서/라이터의 처리 속도(ops/sec)와 최대 메모리 사용량을 측정합니다.
+측정에 쓰는 텍스트와 자막 파일은 실행할 때마다 같은 내용으로 생성합니다.
+--save로 결과를 기준값(baselines.json)으로 저장해 두면, 이후 실행에서 기준값보다 느려진 항목을 표시합니다.
+기준값은 측정한 컴퓨터에서만 의미가 있으므로 같은 컴퓨터에서 비교합니다.
+
+사용 예
+    uv run benchmarks/bench_text.py --quick
+    uv run benchmarks/bench_text.py --save
+    uv run benchmarks/bench_text.py --check --filter srt
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from text_parser import SentenceParser, split_text_by_words  # noqa: E402
+from subtitle.video_caption import Subtitle  # noqa: E402
+from subtitle.parsers import SRTParser, WebVTTParser, SBVParser, SMIParser  # noqa: E402
+from subtitle.writers import SRTWriter, WebVTTWriter, SMIWriter  # noqa: E402
+from subtitle_utils import subtitle_captions, save_to_srt  # noqa: E402
+
+BASELINES = os.path.join(ROOT, 'benchmarks', 'baselines.json')
+
+WORDS = ("the model translation sentence server request document subtitle time value people company "
+         "research government system result market water energy city report analysis").split()
+NAMES = ["Mr. Smith", "Dr. Kim", "Prof. Lee", "Ms. Park", "the U.S.A.", "St. James"]
+CUE_TEXTS = ["Yeah.", "Thank you.", "Where are you going?", "I don't think that's a good idea.",
+             "Let's get out of here,", "before it starts raining.", "<i>Are you sure?</i>"]
+
+
+def make_prose(size, seed=0):
+    """약어, 따옴표, 줄바꿈이 섞인 영어 문단"""
+    rnd = random.Random(seed)
+    parts = []
+    total = 0
+    while total < size:
+        words = [rnd.choice(WORDS) for _ in range(rnd.randint(4, 25))]
+        if rnd.random() < 0.2:
+            words.insert(rnd.randint(0, len(words)), rnd.choice(NAMES))
+        if rnd.random() < 0.1:
+            words.insert(rnd.randint(0, len(words)), '"' + ' '.join(rnd.choice(WORDS) for _ in range(3)) + '."')
+        sent = ' '.join(words)
+        sent = sent[0].upper() + sent[1:] + rnd.choice(['.', '.', '.', '?', '!'])
+        parts.append(sent)
+        parts.append('\n' if rnd.random() < 0.1 else ' ')
+        total += len(sent) + 1
+    return ''.join(parts)[:size].rstrip() + '.'
+
+
+def _ms(ms, sep='.'):
+    hours, ms = divmod(ms, 3600000)
+    minutes, ms = divmod(ms, 60000)
+    seconds, ms = divmod(ms, 1000)
+    return '{:02d}:{:02d}:{:02d}{}{:03d}'.format(hours, minutes, seconds, sep, ms)
+
+
+def make_subtitle(path, fmt, cues, seed=0):
+    """cues개의 자막이 들어 있는 fmt 형식의 자막 파일"""
+    rnd = random.Random(seed)
+    start = 1000
+    with open(path, 'w', encoding='utf-8') as f:
+        if fmt == 'vtt':
+            f.write('WEBVTT\n\n')
+        elif fmt == 'smi':
+            f.write('<SAMI>\n<HEAD>\n<TITLE>bench</TITLE>\n</HEAD>\n<BODY>\n')
+        for i in range(cues):
+            end = start + rnd.randint(800, 4000)
+            text = rnd.choice(CUE_TEXTS)
+            if rnd.random() < 0.3:
+                text += '\n' + rnd.choice(CUE_TEXTS)
+            if fmt == 'srt':
+                f.write('{}\n{} --> {}\n{}\n\n'.format(i + 1, _ms(start, ','), _ms(end, ','), text))
+            elif fmt == 'vtt':
+                f.write('{} --> {}\n{}\n\n'.format(_ms(start), _ms(end), text))
+            elif fmt == 'sbv':
+                f.write('{},{}\n{}\n\n'.format(_ms(start), _ms(end), text))
+            else:
+                f.write('<SYNC Start={}><P Class=KRCC>\n{}\n'.format(start, text.replace('\n', '<br>')))
+                f.write('<SYNC Start={}><P Class=KRCC>&nbsp;\n'.format(end))
+            start = end + rnd.randint(0, 500)
+        if fmt == 'smi':
+            f.write('</BODY>\n</SAMI>\n')
+
+
+class Suite:
+    def __init__(self, workdir, quick):
+        self.workdir = workdir
+        self.quick = quick
+        self.cases = []
+        self.files = {}
+
+    def add(self, name, fn, repeat=5):
+        self.cases.append((name, fn, repeat))
+
+    def subtitle_file(self, fmt, cues):
+        key = (fmt, cues)
+        if key not in self.files:
+            path = os.path.join(self.workdir, 'bench_{}.{}'.format(cues, fmt))
+            make_subtitle(path, fmt, cues)
+            self.files[key] = path
+        return self.files[key]
+
+
+def build(suite):
+    text_sizes = [1000, 10000, 100000] if suite.quick else [1000, 10000, 100000, 1000000]
+    cue_counts = [1000, 10000] if suite.quick else [1000, 10000, 100000]
+
+    for size in text_sizes:
+        text = make_prose(size)
+        repeat = 3 if size >= 100000 else 10
+        suite.add(f'sentence_parse/{size // 1000}KB', lambda text=text: SentenceParser().parse(text), repeat)
+        suite.add(f'split_text_by_words/{size // 1000}KB', lambda text=text: split_text_by_words(text), repeat)
+
+    parsers = {'srt': SRTParser, 'vtt': WebVTTParser, 'sbv': SBVParser, 'smi': SMIParser}
+    for cues in cue_counts:
+        repeat = 3 if cues >= 10000 else 5
+        for fmt, parser in parsers.items():
+            path = suite.subtitle_file(fmt, cues)
+            suite.add(f'read_{fmt}/{cues}', lambda parser=parser, path=path: parser().read(path), repeat)
+
+        captions = Subtitle().from_srt(suite.subtitle_file('srt', cues)).captions
+        writers = {'srt': SRTWriter, 'vtt': WebVTTWriter, 'smi': SMIWriter}
+        for fmt, writer in writers.items():
+            suite.add(f'write_{fmt}/{cues}',
+                      lambda writer=writer, captions=captions: writer().write(captions, io.StringIO()), repeat)
+
+        def round_trip(path=suite.subtitle_file('srt', cues), output=os.path.join(suite.workdir, 'out.srt')):
+            texts, times = subtitle_captions(path)
+            save_to_srt(output, texts, times)
+
+        suite.add(f'srt_round_trip/{cues}', round_trip, repeat)
+
+
+def measure(fn, repeat):
+    fn()  # 워밍업
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    seconds = statistics.median(times)
+
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'ops_per_sec': 1 / seconds, 'seconds': seconds, 'peak_mb': peak / 1024 / 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='텍스트/자막 처리 마이크로 벤치마크')
+    parser.add_argument('--quick', action='store_true', help='작은 입력만 측정')
+    parser.add_argument('--filter', type=str, default='', help='이름에 이 문자열이 포함된 항목만 측정')
+    parser.add_argument('--save', action='store_true', help='결과를 기준값으로 저장')
+    parser.add_argument('--check', action='store_true', help='기준값보다 느려진 항목이 있으면 종료 코드 1 반환')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='느려졌다고 판단하는 비율 (기본값 25%%)')
+    parser.add_argument('--baselines', type=str, default=BASELINES)
+    args = parser.parse_args()
+
+    baselines = {}
+    if os.path.exists(args.baselines):
+        with open(args.baselines, encoding='utf-8') as f:
+            baselines = json.load(f).get('results', {})
+
+    results = {}
+    regressions = []
+    with tempfile.TemporaryDirectory() as workdir:
+        suite = Suite(workdir, args.quick)
+        build(suite)
+        print(f"{'benchmark':<32} {'ops/sec':>10} {'ms/op':>10} {'peak MB':>9} {'vs base':>8}")
+        for name, fn, repeat in suite.cases:
+            if args.filter not in name:
+                continue
+            result = measure(fn, repeat)
+            results[name] = result
+            change = ''
+            if name in baselines:
+                ratio = result['ops_per_sec'] / baselines[name]['ops_per_sec']
+                change = f'{ratio:7.2f}x'
+                if ratio < 1 - args.tolerance:
+                    regressions.append(name)
+                    change += ' !'
+            print(f"{name:<32} {result['ops_per_sec']:>10.2f} {result['seconds'] * 1000:>10.2f} "
+                  f"{result['peak_mb']:>9.2f} {change:>8}")
+
+    if args.save:
+        baselines.update(results)
+        with open(args.baselines, 'w', encoding='utf-8') as f:
+            json.dump({'machine': platform.platform(), 'python': platform.python_version(),
+                       'results': baselines}, f, indent=2, sort_keys=True)
+        print(f"기준값을 {args.baselines}에 저장했습니다.")
+    if regressions:
+        print(f"기준값보다 {args.tolerance:.0%} 이상 느려진 항목: {', '.join(regressions)}")
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
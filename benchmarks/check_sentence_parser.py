@@ -0,0 +1,234 @@
+""" SentenceParser가 이전 구현과 같은 문장 경계를 반환하는지 확인하는 스크립트
+
+문자 단위로 순회하던 이전 구현을 ReferenceSentenceParser로 보관해 두고,
+직접 작성한 사례와 무작위로 생성한 텍스트에서 두 구현의 결과를 비교한 뒤 처리 속도를 비교합니다.
+이전 구현이 예외를 내는 입력('. '로 끝나는 텍스트)과 이전 구현이 텍스트의 마지막 문자를 . 앞의 문자로
+잘못 읽는 입력(. 으로 시작하는 텍스트)은 비교에서 제외합니다.
+StreamingSentenceParser는 같은 텍스트를 무작위 크기의 조각으로 나누어 넣은 결과가 parse 결과와 같은지 확인합니다.
+
+사용 예
+    uv run benchmarks/check_sentence_parser.py --cases 20000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_parser import BOUNDRY_CHARS, SentenceParser, StreamingSentenceParser  # noqa: E402
+from bench_text import make_prose  # noqa: E402
+
+class ReferenceSentenceParser:
+    """비교 기준으로 보관하는 이전 SentenceParser 구현 (문자 단위로 순회)"""
+
+    def __init__(self):
+        self.i = 0
+        self.text = None
+        self.abbreviations = ["Mr.", "Ms.", "Mrs.", "Dr.", "Prof.", "Ph.", "etc.", "e.g.", "i.e.", "a.m.", "p.m.",
+                              "vs.", "No.", "St.", "Ave.", "Dept.", "Inc.", "Ltd.", "Gov."]
+        self.max_len = 255
+        self.sentences = []
+
+    def _next_char_(self, inc=1):
+        if self.i + inc <= len(self.text) - 1:
+            return self.text[self.i + inc]
+        else:
+            return None
+
+    def _skip_(self):
+        if self.i < len(self.text) - 1:
+            self.i += 1
+        else:
+            raise IndexError
+
+    def _is_abbr_(self, word):
+        is_abbreviation = False
+        for abbr in self.abbreviations:
+            if word.endswith(abbr):
+                is_abbreviation = True
+                continue
+        return is_abbreviation
+
+    def _append_(self, sent):
+        sent = sent.replace('\n', ' ').strip()
+        self.sentences.append(sent)
+
+    def parse(self, text):
+        self.text = text
+        self.sentences = []
+        text_len = len(text)
+        self.i = 0
+        i_prev = 0
+        while self.i < text_len:
+            char = text[self.i]
+            if char in ['?', '!']:
+                sent = str(text[i_prev: self.i + 1])
+                self.sentences.append(sent)
+                i_prev = self.i + 1
+            elif char == '.':
+                if self.i < text_len - 1:
+                    next_c = self._next_char_()
+                    if next_c not in BOUNDRY_CHARS:  # . 문자 뒤에 문장 경계 후보에 해당하지 않는 문자가 오는 경우
+                        self.i += 1
+                        continue
+                    else:
+                        if next_c == ' ':
+                            # self._skip_()
+                            if self._next_char_(2) in BOUNDRY_CHARS:  # . 문자 뒤 공백이 오고 그 다음에 문장경계 후보 문자가 오는 경우
+                                sent = str(text[i_prev: self.i + 1])
+                                if self._is_abbr_(sent):
+                                    self.i += 1
+                                else:
+                                    self._append_(sent)
+                                    i_prev = self.i + 1
+                        elif next_c.isupper():
+                            if text[self.i - 1].islower():
+                                sent = str(text[i_prev: self.i + 1])
+                                if not self._is_abbr_(sent):
+                                    self._append_(sent)
+                                    i_prev = self.i + 1
+                            else:
+                                w_i = self.i - 1
+                                # U.S.A.와 같은 등록되지 않은 약어인지 확인하기 위해 대문자와 . 문자를 스킵
+                                while (self.i < text_len - 1) and (self._next_char_() in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ.'):
+                                    self._skip_()
+                                word = str(text[w_i: self.i + 1])
+                                sent = str(text[i_prev: self.i + 1])
+                                # word가 U.S.A와 같은 약어이거나 문장이 등록된 약어로 끝나는 경우
+                                if word.isupper() or self._is_abbr_(sent):
+                                    self.i += 1
+                                else:
+                                    self._append_(sent)
+                                    i_prev = self.i + 1
+                        else:
+                            if next_c == '\n':
+                                self._skip_()
+                            sent = str(text[i_prev: self.i + 1])
+                            if self._is_abbr_(sent):
+                                self.i += 1
+                            else:
+                                self._append_(sent)
+                                i_prev = self.i + 1
+                else:
+                    sent = str(text[i_prev: self.i + 1])
+                    self._append_(sent)
+                    i_prev = self.i + 1
+            elif char == '"':
+                if self.i < len(self.text) - 1:
+                    self._skip_()
+                while (text[self.i] != '"') and (self.i < text_len):
+                    try:
+                        self._skip_()
+                    except IndexError:
+                        break
+            elif char == '\n':
+                if (self.i + 1) < text_len - 1 and self._next_char_().isupper():
+                    sent = str(text[i_prev: self.i + 1])
+                    self._append_(sent)
+                    i_prev = self.i + 1
+                elif self.i - i_prev > self.max_len:
+                    sent = str(text[i_prev: self.i + 1])
+                    self._append_(sent)
+                    i_prev = self.i + 1
+
+            self.i += 1
+
+        if self.i > i_prev:
+            self._append_(str(text[i_prev: self.i + 1]))
+        return self.sentences
+
+
+CASES = [
+    "Hello world. This is a test.",
+    "Mr. Smith went to Washington. He arrived at 5 p.m. Then he left!",
+    "The U.S.A. is big. The U.K. is not.",
+    "He said \"Stop. Now.\" and left. Really?",
+    "Is it 3.14? Yes!Maybe",
+    "first line\nSecond line\nthird line",
+    "word.Next sentence.ABC.Def",
+    "Hello.\n\n",
+    ".Start with a dot",
+    "\"unclosed quote. With. Sentences.",
+    "e.g. this one. i.e. that One.",
+    "Ends with quote.\"",
+    "Line one.\nMr.\nSmith",
+    "x" * 300 + "\n" + "y" * 10,
+    "",
+]
+
+PIECES = ["Mr.", "Dr.", "e.g.", "i.e.", "etc.", "U.S.A.", "No.", "Inc.", ".", ". ", "?", "!", " ", " ", " ", "\n",
+          "\"", "word", "Word", "the", "A", "B", "x", "3.5", "a.m.", "ok", "Yes", "1"]
+
+
+def random_text(rnd):
+    return ''.join(rnd.choice(PIECES) for _ in range(rnd.randint(0, 40)))
+
+
+def compare(text):
+    if text.startswith('.'):
+        return None
+    try:
+        expected = ReferenceSentenceParser().parse(text)
+    except TypeError:  # 이전 구현은 '. '로 끝나는 텍스트에서 예외가 남
+        return None
+    return expected == SentenceParser().parse(text)
+
+
+def compare_stream(text, rnd):
+    parser = StreamingSentenceParser()
+    sentences = []
+    i = 0
+    while i < len(text):
+        size = rnd.choice([1, 1, 2, 3, 7, 64, 4096])
+        sentences += parser.feed(text[i:i + size])
+        i += size
+    sentences += parser.close()
+    return sentences == SentenceParser().parse(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SentenceParser 이전 구현과의 동등성 및 속도 비교')
+    parser.add_argument('--cases', type=int, default=20000, help='무작위 텍스트 수')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    texts = CASES + [random_text(rnd) for _ in range(args.cases)] + [make_prose(size) for size in (1000, 10000)]
+    failures = []
+    skipped = 0
+    for text in texts:
+        result = compare(text)
+        if result is None:
+            skipped += 1
+        elif not result:
+            failures.append(text)
+    print(f"비교 {len(texts) - skipped}건, 불일치 {len(failures)}건, 제외 {skipped}건")
+    for text in failures[:10]:
+        print(repr(text))
+        print('  이전:', ReferenceSentenceParser().parse(text))
+        print('  현재:', SentenceParser().parse(text))
+
+    stream_failures = [text for text in texts if not compare_stream(text, rnd)]
+    print(f"조각 단위 분리 불일치 {len(stream_failures)}건")
+    for text in stream_failures[:10]:
+        print(repr(text))
+    failures += stream_failures
+
+    for size in (10000, 100000, 1000000):
+        text = make_prose(size)
+        elapsed = []
+        for parser_class in (ReferenceSentenceParser, SentenceParser):
+            start = time.perf_counter()
+            parser_class().parse(text)
+            elapsed.append(time.perf_counter() - start)
+        print(f"{size // 1000}KB: 이전 {elapsed[0] * 1000:.1f}ms, 현재 {elapsed[1] * 1000:.1f}ms "
+              f"({elapsed[0] / elapsed[1]:.1f}배)")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+""" SMIParser가 이전 구현과 같은 자막을 반환하는지 확인하는 스크립트
+
+줄을 다시 합친 뒤 <sync, <p 단위로 re.split을 반복하던 이전 구현을 ReferenceSMIParser로 보관해 두고,
+태그의 대소문자, 여러 언어의 P 블록, <br>, &nbsp;, 서식 태그, 인코딩과 줄바꿈 방식을 섞어 무작위로 만든 SAMI 파일에서
+두 구현의 자막(시작/끝 밀리초, 텍스트)을 비교한 뒤 자막 수에 따른 처리 시간을 비교합니다.
+
+사용 예
+    uv run benchmarks/check_smi_parser.py --cases 2000
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from subtitle.generic import Caption  # noqa: E402
+from subtitle.parsers import SMIParser, _decode, _split_lines  # noqa: E402
+from subtitle.exceptions import MalformedFileError  # noqa: E402
+from bench_text import make_subtitle  # noqa: E402
+
+
+def _tplit(s, tag):
+    delimiter = '<' + tag
+    try:
+        return [(delimiter + item).strip() for item in re.split(delimiter, s, flags=re.I)][1:]
+    except:
+        return []
+
+
+def _lookup(s, pattern):
+    return re.search(pattern, s, flags=re.I)
+
+
+def _normalize(content):
+    content = content.replace('\n', ' ')
+    content = re.sub('<br ?/?>', '\n', content, flags=re.I)
+    content = re.sub('<.*?>', '', content)
+    content = re.sub('&nbsp(.)', '', content)
+    content = content.strip()
+    return content
+
+
+def _plang(item):
+    try:
+        match = _lookup(item, '<p(.+)class=([a-z]+)')
+        if match:
+            lang = match.group(2)
+        else:
+            lang = 'KRCC'
+    except AttributeError:
+        raise AttributeError('AttributeError - {}'.format(item))
+    try:
+        content = item[_lookup(item, '<p([^>]*)>').end():]
+        content = _normalize(content)
+    except AttributeError:
+        content = ''
+    return [lang, content]
+
+
+class ReferenceSMIParser(SMIParser):
+    """비교 기준으로 보관하는 이전 SMIParser 구현 (줄 단위로 읽은 뒤 re.split 반복)"""
+
+    def _decode_content(self, raw):
+        return _split_lines(_decode(raw))
+
+    def _validate(self, lines):
+        if len(lines) < 2 or (lines[0].lower() != '<sami>' and not lines[0].startswith('<!--')):
+            raise MalformedFileError('The file does not have a valid format.')
+
+    def _parse(self, lines):
+        raw_text = '\n'.join(lines)
+        prev_cap = ''
+        timecode = ''
+        for index, item in enumerate(_tplit(raw_text, 'sync')):
+            start_time = timecode
+            timecode = Caption().to_timestamp(int(_lookup(item, '<sync start=([0-9]+)').group(1)) / 1000)
+            content = dict(map(_plang, _tplit(item, 'p')))
+            if len(content.keys()) > 0:
+                lang = list(content.keys())[0]
+                content = content[lang]
+            else:
+                content = _normalize(item)
+            if prev_cap:
+                caption = Caption(start=start_time, end=timecode, text=prev_cap)
+                self.track.append(round(caption.start_in_seconds * 1000), round(caption.end_in_seconds * 1000),
+                                  caption.raw_text)
+            prev_cap = content
+
+
+HEADERS = ['<SAMI>\n<HEAD>\n<TITLE>test</TITLE>\n<STYLE TYPE="text/css">\n<!--\nP { margin-left:8pt; }\n'
+           '.KRCC {Name:Korean; lang:ko-KR; SAMIType:CC;}\n-->\n</STYLE>\n</HEAD>\n<BODY>\n',
+           '<sami>\n<body>\n', '<!-- comment -->\n<SAMI>\n<BODY>\n', '\n\n<SAMI>\n<BODY>\n']
+SYNC_TAGS = ['<SYNC Start={}>', '<sync start={}>', '<Sync Start={}>', '<SYNC Start={} End={}>']
+P_TAGS = ['<P Class=KRCC>', '<P class=ENCC>', '<p class=krcc>', '<P>', '<P Class="KRCC">', '<P ID=x Class=ENUSCC>',
+          '<P Class=KRCC\n>', '']
+TEXTS = ['안녕하세요', '어디 가세요?', 'Where are you going?', '<font color="#ffff00">노란색</font> 글자',
+         '<i>Are you sure?</i>', '&nbsp;', '&nbsp', '&NBSP;', '첫 줄<br>둘째 줄', '첫 줄<BR/>둘째 줄', 'a<br />b',
+         '  공백  ', '', '<b', '3 < 4', '<!-- 주석 -->남김', '&nbsp;&nbsp;x', 'x\n y', '\t탭']
+
+
+def make_document(rnd):
+    parts = [rnd.choice(HEADERS)]
+    start = rnd.randint(0, 5000)
+    for _ in range(rnd.randint(0, 30)):
+        sync_tag = '<SYNC Start="{}">' if rnd.random() < 0.005 else rnd.choice(SYNC_TAGS)  # 가끔 잘못된 태그
+        parts.append(sync_tag.format(start, start + 1000))
+        start += rnd.randint(1, 5000)
+        for _ in range(rnd.choice([0, 1, 1, 1, 2, 3])):
+            parts.append(rnd.choice(P_TAGS))
+            parts.append(''.join(rnd.choice(TEXTS) for _ in range(rnd.randint(0, 3))))
+            if rnd.random() < 0.2:
+                parts.append('</P>')
+        parts.append(rnd.choice(['\n', '\n', ' ', '', '\n\n']))
+    parts.append(rnd.choice(['</BODY>\n</SAMI>\n', '</body></sami>', '']))
+    return ''.join(parts)
+
+
+def write_document(path, text, rnd):
+    newline = rnd.choice(['\n', '\n', '\r\n', '\r'])
+    encoding = rnd.choice(['utf-8', 'utf-8', 'cp949', 'utf-8-sig'])
+    with open(path, 'w', encoding=encoding, newline=newline) as f:
+        f.write(text)
+
+
+def read_captions(parser_class, path):
+    try:
+        captions = parser_class().read(path).captions
+    except Exception as e:
+        return type(e).__name__
+    return [(round(c.start_in_seconds * 1000), round(c.end_in_seconds * 1000), c.raw_text) for c in captions]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SMIParser 이전 구현과의 동등성 및 속도 비교')
+    parser.add_argument('--cases', type=int, default=2000, help='무작위 SAMI 파일 수')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    failures = []
+    errors = 0
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'case.smi')
+        for _ in range(args.cases):
+            text = make_document(rnd)
+            write_document(path, text, rnd)
+            expected = read_captions(ReferenceSMIParser, path)
+            result = read_captions(SMIParser, path)
+            if isinstance(expected, str):
+                # 이전 구현은 잘못된 SYNC 태그에서 AttributeError를 냄, 현재 구현은 MalformedCaptionError
+                errors += 1
+                if not isinstance(result, str):
+                    failures.append((text, expected, result))
+            elif expected != result:
+                failures.append((text, expected, result))
+        print(f"비교 {args.cases}건 (예외 {errors}건), 불일치 {len(failures)}건")
+        for text, expected, result in failures[:5]:
+            print(repr(text))
+            print('  이전:', expected)
+            print('  현재:', result)
+
+        for cues in (1000, 10000, 100000):
+            path = os.path.join(workdir, f'{cues}.smi')
+            make_subtitle(path, 'smi', cues)
+            elapsed = []
+            for parser_class in (ReferenceSMIParser, SMIParser):
+                start = time.perf_counter()
+                captions = read_captions(parser_class, path)
+                elapsed.append(time.perf_counter() - start)
+            print(f"{cues}개 자막: 이전 {elapsed[0] * 1000:.1f}ms, 현재 {elapsed[1] * 1000:.1f}ms "
+                  f"({elapsed[0] / elapsed[1]:.1f}배, 자막당 {elapsed[1] / len(captions) * 1e6:.2f}us)")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+""" 모델 정밀도별 지연 시간, 최대 메모리(RSS), 번역 품질 변화 평가
+
+fp32, bf16, int8 모델로 같은 샘플 문장을 번역하고, fp32 번역 결과를 기준으로 BLEU/chrF 차이를 계산합니다.
+최대 메모리를 정밀도별로 따로 재기 위해 각 정밀도는 별도 프로세스에서 실행합니다.
+BLEU/chrF 계산에는 sacrebleu가 필요합니다. (uv pip install sacrebleu)
+
+사용 예
+    uv run benchmarks/eval_precision.py -m ./models/BlueT --precision fp32 bf16 int8
+"""
+import argparse
+import multiprocessing
+import os
+import queue as queue_module
+import statistics
+import sys
+import time
+import traceback
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SAMPLES = os.path.join(ROOT, 'benchmarks', 'data', 'samples.txt')
+TIMEOUT = 3600  # 한 정밀도의 측정을 기다리는 최대 시간(초)
+
+
+def load_samples(path):
+    with open(path, encoding='utf-8') as f:
+        return [line.rstrip('\n') for line in f if line.strip()]
+
+
+def peak_rss_mb():
+    try:
+        import resource
+        # 리눅스는 KB, macOS는 byte 단위
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss / 1024 / 1024 if sys.platform == 'darwin' else rss / 1024
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 1024 / 1024
+
+
+def run(model_path, tokenizer_name, precision, samples, batch, repeat, queue):
+    try:
+        queue.put(measure(model_path, tokenizer_name, precision, samples, batch, repeat))
+    except BaseException:
+        traceback.print_exc()
+        queue.put(None)
+
+
+def measure(model_path, tokenizer_name, precision, samples, batch, repeat):
+    from transformers import AutoTokenizer
+    from engine import load_engine
+
+    tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+    engine = load_engine(model_path, tokenizer, max_batch=batch, max_length=255, precision=precision)
+    engine.translate(samples[:batch])  # 워밍업
+
+    times = []
+    targets = []
+    for _ in range(repeat):
+        targets = []
+        start = time.perf_counter()
+        for i in range(0, len(samples), batch):
+            targets.extend(engine.translate(samples[i:i + batch]))
+        times.append(time.perf_counter() - start)
+    return {'precision': precision, 'seconds': statistics.median(times), 'rss': peak_rss_mb(), 'targets': targets}
+
+
+def wait_result(process, queue, timeout=TIMEOUT):
+    """자식 프로세스의 측정 결과를 기다립니다. 실패하거나 시간 안에 끝나지 않으면 RuntimeError를 발생시킵니다."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            result = queue.get(timeout=1)
+            break
+        except queue_module.Empty:
+            # 결과를 보내기 전에 프로세스가 끝난 경우 (예: 메모리 부족으로 종료)
+            if not process.is_alive() and queue.empty():
+                raise RuntimeError(f"프로세스가 종료되었습니다 (exit code {process.exitcode})")
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{timeout}초 안에 끝나지 않았습니다")
+    if result is None:
+        raise RuntimeError("측정 중 오류가 발생했습니다")
+    return result
+
+
+def score(hypotheses, references):
+    try:
+        import sacrebleu
+    except ImportError:
+        return None, None
+    bleu = sacrebleu.corpus_bleu(hypotheses, [references], tokenize='char')
+    chrf = sacrebleu.corpus_chrf(hypotheses, [references])
+    return bleu.score, chrf.score
+
+
+def main():
+    parser = argparse.ArgumentParser(description='모델 정밀도별 성능 및 번역 품질 평가')
+    parser.add_argument('-m', '--model', type=str, default='./models/BlueT')
+    parser.add_argument('--tokenizer', type=str, default='paust/pko-t5-base')
+    parser.add_argument('--precision', type=str, nargs='+', default=['fp32', 'bf16', 'int8'])
+    parser.add_argument('--samples', type=str, default=SAMPLES)
+    parser.add_argument('-b', '--batch', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    samples = load_samples(args.samples)
+    ctx = multiprocessing.get_context('spawn')
+    results = []
+    failed = []
+    for precision in args.precision:
+        queue = ctx.Queue()
+        process = ctx.Process(target=run, args=(args.model, args.tokenizer, precision, samples,
+                                                args.batch, args.repeat, queue))
+        process.start()
+        try:
+            results.append(wait_result(process, queue))
+        except RuntimeError as e:
+            print(f"{precision} 실패 - {e}")
+            failed.append(precision)
+        finally:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+    if not results:
+        sys.exit("측정에 성공한 정밀도가 없습니다.")
+
+    references = next((r['targets'] for r in results if r['precision'] == 'fp32'), None)
+    print(f"{len(samples)}개 문장, 배치 크기 {args.batch}")
+    print(f"{'precision':>10} {'sec':>8} {'sent/s':>8} {'peak RSS':>10} {'BLEU':>7} {'chrF':>7}")
+    for r in results:
+        bleu, chrf = score(r['targets'], references) if references is not None else (None, None)
+        bleu = f"{bleu:7.2f}" if bleu is not None else f"{'-':>7}"
+        chrf = f"{chrf:7.2f}" if chrf is not None else f"{'-':>7}"
+        print(f"{r['precision']:>10} {r['seconds']:8.2f} {len(samples) / r['seconds']:8.1f} "
+              f"{r['rss']:8.0f}MB {bleu} {chrf}")
+    if references is None:
+        print("fp32 결과가 없어 BLEU/chrF는 계산하지 않았습니다.")
+    if failed:
+        print(f"실패한 정밀도: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+""" 네트워크 없이 벤치마크를 돌리기 위한 작은 무작위 T5 모델과 문자 단위 토크나이저 """
+import string
+
+from tokenizers import Regex, Tokenizer, models, pre_tokenizers, processors
+from transformers import PreTrainedTokenizerFast, T5Config, T5ForConditionalGeneration
+
+SPECIAL_TOKENS = ['<pad>', '</s>', '<unk>']
+
+
+def make_tokenizer():
+    vocab = SPECIAL_TOKENS + list(string.ascii_letters + string.digits + string.punctuation)
+    tokenizer = Tokenizer(models.WordLevel({token: i for i, token in enumerate(vocab)}, unk_token='<unk>'))
+    tokenizer.pre_tokenizer = pre_tokenizers.Sequence([
+        pre_tokenizers.WhitespaceSplit(),
+        pre_tokenizers.Split(pattern=Regex('.'), behavior='isolated'),
+    ])
+    tokenizer.post_processor = processors.TemplateProcessing(single='$A </s>', special_tokens=[('</s>', 1)])
+    return PreTrainedTokenizerFast(tokenizer_object=tokenizer, pad_token='<pad>', eos_token='</s>', unk_token='<unk>',
+                                   model_input_names=['input_ids', 'attention_mask'])
+
+
+def make_model(tokenizer, d_model=64, num_layers=2, seed=0):
+    import torch
+
+    torch.manual_seed(seed)
+    config = T5Config(vocab_size=len(tokenizer), d_model=d_model, d_ff=d_model * 2, d_kv=d_model // 4,
+                      num_layers=num_layers, num_heads=4, decoder_start_token_id=tokenizer.pad_token_id,
+                      pad_token_id=tokenizer.pad_token_id, eos_token_id=tokenizer.eos_token_id)
+    model = T5ForConditionalGeneration(config)
+    model.eval()
+    return model
@@ -1,10 +1,10 @@
 import sys
 import os
 import argparse
-from transformers import AutoConfig, T5ForConditionalGeneration
+from transformers import AutoConfig, AutoTokenizer, T5ForConditionalGeneration
 
 
-def download_model(model_name, save_dir=None, use_auth_token=None):
+def download_model(model_name, save_dir=None, use_auth_token=None, tokenizer_name=None):
     """
     Hugging Face에서 모델을 다운로드하고 선택적으로 로컬에 저장합니다.
 
@@ -12,6 +12,7 @@ def download_model(model_name, save_dir=None, use_auth_token=None):
         model_name (str): Hugging Face 모델 이름 (예: 'bert-base-uncased', 'gpt2')
         save_dir (str, optional): 모델을 저장할 디렉토리 경로
         use_auth_token (str, optional): 비공개 또는 게이트된 모델에 접근하기 위한 Hugging Face 토큰
+        tokenizer_name (str, optional): 모델과 함께 저장할 토크나이저 이름. 저장해 두면 서버가 네트워크 없이 시작됨
 
     Returns:
         bool: 다운로드 성공 여부
@@ -44,6 +45,11 @@ def download_model(model_name, save_dir=None, use_auth_token=None):
             model.save_pretrained(model_path)
             print("모델 가중치 저장 완료")
 
+            if tokenizer_name:
+                tokenizer = AutoTokenizer.from_pretrained(tokenizer_name, use_auth_token=use_auth_token)
+                tokenizer.save_pretrained(model_path)
+                print("토크나이저 저장 완료")
+
             print(f"모델이 '{model_path}' 경로에 성공적으로 저장되었습니다.")
         else:
             print("저장 경로가 지정되지 않아 모델을 로컬에 저장하지 않았습니다.")
@@ -60,11 +66,12 @@ if __name__ == "__main__":
     parser.add_argument('model_name', type=str, help='다운로드할 Hugging Face 모델 이름')
     parser.add_argument('--save_dir', type=str, default='./models', help='모델을 저장할 디렉토리 경로')
     parser.add_argument('--token', type=str, default=None, help='Hugging Face 인증 토큰 (비공개 모델용)')
+    parser.add_argument('--tokenizer', type=str, default='paust/pko-t5-base', help='모델과 함께 저장할 토크나이저 이름')
 
     args = parser.parse_args()
 
     # 모델 다운로드 실행
-    success = download_model(args.model_name, args.save_dir, args.token)
+    success = download_model(args.model_name, args.save_dir, args.token, args.tokenizer)
 
     if success:
         print("모델 다운로드가 성공적으로 완료되었습니다.")
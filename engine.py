@@ -0,0 +1,143 @@
+""" 번역 모델 추론 엔진 """
+import os
+import threading
+import time
+
+from metrics import STAGE_SECONDS
+
+# torch, transformers는 가져오는 데 시간이 오래 걸리므로 실제로 모델을 불러올 때 import 함
+
+TOKENIZER_NAME = "paust/pko-t5-base"
+TOKENIZER_FILES = ['tokenizer.json', 'tokenizer_config.json', 'spiece.model']
+
+
+class InferenceEngine:
+    """
+    번역 엔진 인터페이스.
+    프롬프트가 붙은 문장 리스트를 받아 같은 순서의 번역 결과 리스트를 반환합니다.
+    """
+
+    def translate(self, sources):
+        raise NotImplementedError
+
+
+class GenerateEngine(InferenceEngine):
+    """
+    토크나이저와 model.generate를 직접 호출하는 엔진.
+    입력 문장을 메모리에서 바로 토큰화하고, max_batch 문장씩 나누어 생성합니다.
+
+    Args:
+        model: generate()를 지원하는 seq2seq 모델
+        tokenizer: 모델의 토크나이저
+        max_batch (int): 한 번의 generate 호출에 넣을 최대 문장 수
+        max_length (int): 생성할 최대 토큰 수
+        device (str): 입력 텐서를 올릴 장치
+    """
+
+    def __init__(self, model, tokenizer, max_batch=8, max_length=255, device='cpu'):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.max_batch = max_batch
+        self.max_length = max_length
+        self.device = device
+        # fast 토크나이저는 여러 스레드에서 동시에 호출하면 오류가 날 수 있음
+        self._lock = threading.Lock()
+
+    def _generate(self, sources):
+        import torch
+
+        start = time.perf_counter()
+        with self._lock:
+            inputs = self.tokenizer(sources, return_tensors='pt', padding=True, return_token_type_ids=False)
+        inputs = inputs.to(self.device)
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage='tokenize')
+
+        start = time.perf_counter()
+        with torch.inference_mode():
+            outputs = self.model.generate(**inputs, max_length=self.max_length)
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage='generate')
+
+        start = time.perf_counter()
+        with self._lock:
+            targets = self.tokenizer.batch_decode(outputs, skip_special_tokens=True, clean_up_tokenization_spaces=False)
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage='decode')
+        return targets
+
+    def translate(self, sources):
+        sources = [source.strip() for source in sources]
+        targets = []
+        for i in range(0, len(sources), self.max_batch):
+            targets.extend(self._generate(sources[i:i + self.max_batch]))
+        return targets
+
+
+PRECISIONS = ['fp32', 'bf16', 'int8']
+BACKENDS = ['torch', 'onnx']
+
+
+def set_num_threads(num_threads, interop_threads=0):
+    """
+    torch 연산(intra-op)에 사용할 스레드 수와 연산 사이의 병렬 실행(inter-op)에 사용할 스레드 수를 설정합니다. 0이면 바꾸지 않습니다.
+    interop_threads는 torch가 병렬 작업을 시작하기 전에 한 번만 설정할 수 있으므로 모델을 실행하기 전에 호출해야 합니다.
+    """
+    if num_threads <= 0 and interop_threads <= 0:
+        return  # 바꿀 값이 없으면 torch를 가져오지 않음 (서버 시작 시 import를 모델 로딩까지 미룸)
+    import torch
+
+    if num_threads > 0:
+        torch.set_num_threads(num_threads)
+    if interop_threads > 0:
+        torch.set_num_interop_threads(interop_threads)
+
+
+def load_tokenizer(model_path, tokenizer_name=TOKENIZER_NAME):
+    """
+    모델 디렉토리에 함께 저장된 토크나이저를 불러옵니다.
+    모델 디렉토리에 토크나이저가 없으면 tokenizer_name의 토크나이저를 hub 또는 로컬 캐시에서 불러옵니다.
+    """
+    from transformers import AutoTokenizer, T5TokenizerFast
+
+    if any(os.path.exists(os.path.join(model_path, name)) for name in TOKENIZER_FILES):
+        return AutoTokenizer.from_pretrained(model_path)
+    return T5TokenizerFast.from_pretrained(tokenizer_name)
+
+
+def load_engine(model_path, tokenizer, max_batch=8, max_length=255, precision='fp32', backend='torch'):
+    """
+    model_path의 모델을 불러와 번역 엔진을 만듭니다.
+
+    Args:
+        precision (str): 'fp32', 'bf16'(bfloat16 가중치), 'int8'(Linear 레이어 동적 int8 양자화, CPU 전용)
+        backend (str): 'torch'(GPU가 있으면 GPU, 없으면 CPU) 또는
+            'onnx'(export_onnx.py로 변환한 모델을 onnxruntime CPU에서 실행)
+    """
+    if backend == 'onnx':
+        return _load_onnx_engine(model_path, tokenizer, max_batch, max_length, precision)
+    if backend != 'torch':
+        raise ValueError(f"지원하지 않는 backend입니다: {backend}")
+
+    import torch
+    from transformers import AutoModelForSeq2SeqLM
+
+    if precision not in PRECISIONS:
+        raise ValueError(f"지원하지 않는 precision입니다: {precision}")
+    device = 'cuda' if torch.cuda.is_available() else 'cpu'
+    if precision == 'int8' and device != 'cpu':
+        raise ValueError("int8 양자화는 CPU에서만 사용할 수 있습니다.")
+
+    dtype = torch.bfloat16 if precision == 'bf16' else torch.float32
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_path, torch_dtype=dtype)
+    if precision == 'int8':
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    model = model.to(device)
+    model.eval()
+    return GenerateEngine(model, tokenizer, max_batch=max_batch, max_length=max_length, device=device)
+
+
+def _load_onnx_engine(model_path, tokenizer, max_batch, max_length, precision):
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+    if precision != 'fp32':
+        raise ValueError("onnx backend는 fp32만 지원합니다.")
+    model = ORTModelForSeq2SeqLM.from_pretrained(model_path, provider='CPUExecutionProvider', use_cache=True)
+    return GenerateEngine(model, tokenizer, max_batch=max_batch, max_length=max_length, device='cpu')
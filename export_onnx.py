@@ -0,0 +1,50 @@
+import sys
+import argparse
+
+
+def export_model(model_path, output_dir, opset=None):
+    """
+    T5 번역 모델을 onnxruntime에서 실행할 수 있는 ONNX 그래프로 변환합니다.
+    인코더, 디코더, past key values를 사용하는 디코더 그래프가 output_dir에 저장됩니다.
+
+    Args:
+        model_path (str): 변환할 모델의 경로 (예: './models/BlueT')
+        output_dir (str): ONNX 모델을 저장할 디렉토리 경로
+        opset (int, optional): ONNX opset 버전. 지정하지 않으면 기본값 사용
+
+    Returns:
+        bool: 변환 성공 여부
+    """
+    try:
+        from optimum.exporters.onnx import main_export
+    except ImportError:
+        print("ONNX 변환에는 optimum과 onnxruntime이 필요합니다. (uv pip install optimum[onnxruntime])")
+        return False
+
+    print(f"모델 '{model_path}'를 ONNX로 변환 중...")
+
+    try:
+        main_export(model_path, output=output_dir, task='text2text-generation-with-past', opset=opset, device='cpu')
+        print(f"ONNX 모델이 '{output_dir}' 경로에 성공적으로 저장되었습니다.")
+        return True
+
+    except Exception as e:
+        print(f"오류 발생: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='번역 모델 ONNX 변환기')
+    parser.add_argument('-m', '--model', type=str, default='./models/BlueT', help='변환할 모델의 경로')
+    parser.add_argument('--save_dir', type=str, default='./models/BlueT-onnx', help='ONNX 모델을 저장할 디렉토리 경로')
+    parser.add_argument('--opset', type=int, default=None, help='ONNX opset 버전')
+
+    args = parser.parse_args()
+
+    success = export_model(args.model, args.save_dir, args.opset)
+
+    if success:
+        print("서버 실행 시 --backend onnx -m {} 옵션을 사용하세요.".format(args.save_dir))
+    else:
+        print("ONNX 변환에 실패했습니다.")
+        sys.exit(1)
@@ -0,0 +1,248 @@
+""" 오래 걸리는 번역 작업을 백그라운드에서 실행하고 진행 상황을 SQLite에 기록하는 작업 관리자 """
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+
+logger = logging.getLogger('nmt')
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+POLL_INTERVAL = 1.0  # 다른 프로세스가 넣은 작업을 확인하는 간격(초)
+
+
+class JobManager:
+    """
+    작업을 SQLite 테이블에 기록하고 workers개의 작업자로 실행합니다.
+    작업자는 테이블에서 대기 중인 작업을 하나씩 가져가므로, 여러 프로세스가 같은 테이블을 함께 사용할 수 있습니다.
+    서버가 재시작되면 실행 중이던 작업을 처음부터 다시 실행합니다.
+    SQLite 작업은 다른 프로세스의 잠금을 기다리는 동안 이벤트 루프를 막지 않도록 별도 스레드에서 실행합니다.
+
+    Args:
+        run_fn (callable): (작업 파라미터 dict, 진행 상황 콜백)을 받아 출력 파일 경로를 반환하는 코루틴 함수.
+            진행 상황 콜백은 (완료한 수, 전체 수)를 받습니다.
+        db_path (str): 작업 테이블을 저장할 SQLite 파일 경로
+        workers (int): 동시에 실행할 작업 수
+        max_queue (int): 대기할 수 있는 최대 작업 수
+        run_id (str): 서버 실행마다 달라지는 id. replica들은 같은 run_id를 사용합니다. 지정하지 않으면 새로 만듭니다.
+        replica (int): 같은 run_id 안에서 이 프로세스를 구분하는 번호
+    """
+
+    def __init__(self, run_fn, db_path, workers=1, max_queue=100, run_id=None, replica=0):
+        self.run_fn = run_fn
+        self.workers = workers
+        self.max_queue = max_queue
+        self._db = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._db_lock = threading.Lock()  # SQLite 연결은 한 번에 한 스레드만 사용
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS jobs ('
+                         'id TEXT PRIMARY KEY, status TEXT NOT NULL, params TEXT NOT NULL, '
+                         'done INTEGER NOT NULL DEFAULT 0, total INTEGER NOT NULL DEFAULT 0, '
+                         "output TEXT NOT NULL DEFAULT '', error TEXT NOT NULL DEFAULT '', "
+                         'created REAL NOT NULL, started REAL, finished REAL)')
+        columns = [row[1] for row in self._db.execute('PRAGMA table_info(jobs)')]
+        if 'owner' not in columns:  # 이전 버전에서 만든 테이블
+            self._db.execute("ALTER TABLE jobs ADD COLUMN owner TEXT NOT NULL DEFAULT ''")
+        self._db.commit()
+        # 실행 중인 작업을 가져간 프로세스 ('<run_id>:<replica>')
+        self.run_id = run_id or uuid.uuid4().hex
+        self.owner = f'{self.run_id}:{replica}'
+        self._wakeup = None
+        self._tasks = []
+        self._running = {}  # 작업 id -> 실행 중인 asyncio.Task
+        self._progress = {}  # 작업 id -> 아직 기록하지 않은 최신 (완료한 수, 전체 수)
+        self._reporters = {}  # 작업 id -> 진행 상황을 기록하는 asyncio.Task
+        self._stopping = False
+
+    async def _call(self, fn, *args, **kwargs):
+        """SQLite를 사용하는 함수 fn을 별도 스레드에서 실행합니다."""
+        return await asyncio.to_thread(self._locked, fn, *args, **kwargs)
+
+    def _locked(self, fn, *args, **kwargs):
+        with self._db_lock:
+            return fn(*args, **kwargs)
+
+    def _update(self, job_id, **fields):
+        columns = ', '.join(f'{name} = ?' for name in fields)
+        self._db.execute(f'UPDATE jobs SET {columns} WHERE id = ?', (*fields.values(), job_id))
+        self._db.commit()
+
+    def _requeue_stale(self):
+        self._db.execute('UPDATE jobs SET status = ?, done = 0, started = NULL, owner = ? '
+                         'WHERE status = ? AND (owner = ? OR owner NOT LIKE ?)',
+                         (QUEUED, '', RUNNING, self.owner, self.run_id + ':%'))
+        self._db.commit()
+
+    async def start(self):
+        """
+        실행 중이던 프로세스가 끝나 멈춘 작업을 대기 상태로 되돌리고 작업자를 시작합니다.
+        이전 서버 실행(다른 run_id)의 작업과, 비정상 종료 후 다시 시작한 경우 같은 replica가 실행하던 작업을 되돌립니다.
+        """
+        self._wakeup = asyncio.Event()
+        await self._call(self._requeue_stale)
+        self._tasks = [asyncio.ensure_future(self._work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """실행 중인 작업을 멈춥니다. 멈춘 작업은 다음에 서버를 시작할 때 다시 실행됩니다."""
+        self._stopping = True
+        for task in list(self._running.values()) + self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._running.values(), *self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _queued(self):
+        return self._db.execute('SELECT COUNT(*) FROM jobs WHERE status = ?', (QUEUED,)).fetchone()[0]
+
+    def _insert(self, params):
+        if self._queued() >= self.max_queue:
+            raise JobQueueFull('대기 중인 작업이 너무 많습니다.')
+        job_id = uuid.uuid4().hex
+        self._db.execute('INSERT INTO jobs (id, status, params, created) VALUES (?, ?, ?, ?)',
+                         (job_id, QUEUED, json.dumps(params, ensure_ascii=False), time.time()))
+        self._db.commit()
+        return self._get(job_id)
+
+    async def submit(self, **params):
+        """작업을 대기열에 넣고 작업 상태를 반환합니다. 대기열이 가득 차면 JobQueueFull을 발생시킵니다."""
+        job = await self._call(self._insert, params)
+        self._wakeup.set()
+        return job
+
+    async def get(self, job_id):
+        """작업 상태를 반환합니다. 작업이 없으면 None을 반환합니다."""
+        return await self._call(self._get, job_id)
+
+    def _get(self, job_id):
+        row = self._db.execute('SELECT id, status, params, done, total, output, error, created, started, finished '
+                               'FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(['id', 'status', 'params', 'done', 'total', 'output', 'error', 'created', 'started',
+                        'finished'], row))
+        job['params'] = json.loads(job['params'])
+        # 지금까지의 처리 속도로 남은 시간(초)을 추정
+        job['eta'] = None
+        if job['status'] == RUNNING and job['done'] > 0:
+            elapsed = time.time() - job['started']
+            job['eta'] = elapsed / job['done'] * (job['total'] - job['done'])
+        return job
+
+    def _cancel(self, job_id):
+        job = self._get(job_id)
+        if job is None or job['status'] not in (QUEUED, RUNNING):
+            return job
+        self._update(job_id, status=CANCELLED, finished=time.time())
+        return self._get(job_id)
+
+    async def cancel(self, job_id):
+        """대기 중이거나 실행 중인 작업을 취소하고 작업 상태를 반환합니다."""
+        job = await self._call(self._cancel, job_id)
+        task = self._running.get(job_id)
+        if job is not None and job['status'] == CANCELLED and task is not None:
+            task.cancel()
+        return job
+
+    def _claim(self):
+        """가장 오래 기다린 작업을 이 프로세스가 실행하도록 표시하고 작업 id를 반환합니다. 대기 중인 작업이 없으면 None"""
+        # 다른 프로세스가 같은 작업을 가져가지 않도록 조회와 변경을 한 쓰기 트랜잭션에서 실행
+        self._db.execute('BEGIN IMMEDIATE')
+        try:
+            row = self._db.execute('SELECT id FROM jobs WHERE status = ? ORDER BY created LIMIT 1',
+                                   (QUEUED,)).fetchone()
+            if row is not None:
+                self._db.execute('UPDATE jobs SET status = ?, owner = ?, started = ? WHERE id = ?',
+                                 (RUNNING, self.owner, time.time(), row[0]))
+            self._db.commit()
+        except BaseException:
+            self._db.rollback()
+            raise
+        return row[0] if row is not None else None
+
+    async def _next_job(self):
+        while True:
+            job_id = await self._call(self._claim)
+            if job_id is not None:
+                return job_id
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    def _report(self, job_id, done, total):
+        """진행 상황을 기록하고 작업 상태를 반환합니다."""
+        self._update(job_id, done=done, total=total)
+        return self._db.execute('SELECT status FROM jobs WHERE id = ?', (job_id,)).fetchone()[0]
+
+    async def _report_progress(self, job_id):
+        # 기록하는 동안 들어온 진행 상황은 최신 값 하나만 이어서 기록
+        try:
+            while job_id in self._progress:
+                done, total = self._progress.pop(job_id)
+                try:
+                    status = await self._call(self._report, job_id, done, total)
+                except Exception:
+                    logger.exception(f"작업 {job_id}의 진행 상황을 기록하지 못했습니다.")
+                    continue
+                # 다른 프로세스에서 취소한 작업
+                if status == CANCELLED and job_id in self._running:
+                    self._running[job_id].cancel()
+        finally:
+            del self._reporters[job_id]
+
+    async def _work(self):
+        while True:
+            job_id = await self._next_job()
+            job = await self.get(job_id)
+
+            def progress(done, total, job_id=job_id):
+                self._progress[job_id] = (done, total)
+                if job_id not in self._reporters:
+                    self._reporters[job_id] = asyncio.ensure_future(self._report_progress(job_id))
+
+            task = asyncio.ensure_future(self.run_fn(job['params'], progress))
+            self._running[job_id] = task
+            try:
+                output = await task
+                fields = dict(status=DONE, output=output, finished=time.time())
+            except asyncio.CancelledError:
+                if self._stopping:
+                    await self._finish(job_id, dict(status=QUEUED, done=0, started=None, owner=''))
+                    raise
+                await self._finish(job_id, None)
+                continue
+            except Exception as e:
+                logger.exception(f"작업 {job_id} 실패")
+                fields = dict(status=FAILED, error=str(e), finished=time.time())
+            finally:
+                del self._running[job_id]
+            await self._finish(job_id, fields)
+
+    async def _finish(self, job_id, fields):
+        """남은 진행 상황 기록이 끝나기를 기다린 뒤 작업의 최종 상태를 기록합니다."""
+        self._progress.pop(job_id, None)
+        reporter = self._reporters.get(job_id)
+        if reporter is not None:
+            await asyncio.gather(reporter, return_exceptions=True)
+        if fields:
+            await self._call(self._update, job_id, **fields)
+
+    def _counts(self):
+        return dict(self._db.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall())
+
+    async def stats(self):
+        counts = await self._call(self._counts)
+        return {'queue_depth': counts.get(QUEUED, 0),
+                'running': len(self._running), 'jobs': counts}
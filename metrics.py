@@ -0,0 +1,132 @@
+""" Prometheus 텍스트 형식으로 내보내는 서버 지표 """
+import threading
+
+REGISTRY = []
+CONST_LABELS = {}  # 모든 지표에 붙이는 레이블 (replica로 실행하면 replica 번호)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    # 정수는 그대로, 실수는 유효 숫자를 잃지 않도록 repr로 표시
+    if isinstance(value, int):
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format(name, labels, value):
+    if labels:
+        label_text = ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+        return f'{name}{{{label_text}}} {_format_value(value)}'
+    return f'{name} {_format_value(value)}'
+
+
+class Metric:
+    """
+    지표의 공통 부분.
+    set_function으로 함수를 지정하면 지표를 내보낼 때마다 함수의 반환값을 사용합니다.
+    """
+    kind = 'untyped'
+
+    def __init__(self, name, doc, labels=()):
+        self.name = name
+        self.doc = doc
+        self.labels = tuple(labels)
+        self._values = {}
+        self._function = None
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(label, '')) for label in self.labels)
+
+    def set_function(self, fn):
+        self._function = fn
+
+    def samples(self):
+        if self._function is not None:
+            yield self.name, {}, self._function()
+            return
+        with self._lock:
+            values = list(self._values.items())
+        if not values and not self.labels:
+            values = [((), 0)]
+        for key, value in values:
+            yield self.name, dict(zip(self.labels, key)), value
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, doc, labels=(), buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)):
+        super().__init__(name, doc, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.setdefault(key, [[0] * len(self.buckets), 0.0, 0])  # 버킷별 누적 수, 합, 개수
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        with self._lock:
+            values = [(key, (list(v[0]), v[1], v[2])) for key, v in self._values.items()]
+        for key, (counts, total, count) in values:
+            labels = dict(zip(self.labels, key))
+            for bound, bucket_count in zip(self.buckets, counts):
+                yield self.name + '_bucket', dict(labels, le=f'{bound:g}'), bucket_count
+            yield self.name + '_bucket', dict(labels, le='+Inf'), count
+            yield self.name + '_sum', labels, total
+            yield self.name + '_count', labels, count
+
+
+def render():
+    """등록된 모든 지표를 Prometheus 텍스트 형식으로 반환합니다."""
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f'# HELP {metric.name} {metric.doc}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        for name, labels, value in metric.samples():
+            lines.append(_format(name, {**CONST_LABELS, **labels}, value))
+    return '\n'.join(lines) + '\n'
+
+
+REQUESTS = Counter('nmt_requests_total', '엔드포인트별 요청 수', ['endpoint', 'status'])
+REQUEST_SECONDS = Histogram('nmt_request_seconds', '엔드포인트별 요청 처리 시간(초)', ['endpoint'],
+                            buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300))
+STAGE_SECONDS = Histogram('nmt_stage_seconds', '단계별 소요 시간(초). stage: split, tokenize, generate, decode',
+                          ['stage'], buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10))
+BATCH_SIZE = Histogram('nmt_batch_size', '모델 배치의 문장 수', buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+BATCH_PADDING_RATIO = Histogram('nmt_batch_padding_ratio', '모델 배치에서 패딩이 차지하는 토큰 비율',
+                                buckets=(0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.8, 1.0))
+SENTENCES = Counter('nmt_sentences_total', '모델로 번역한 문장 수')
+TOKENS = Counter('nmt_tokens_total', '모델에 입력된 토큰 수(패딩 제외)')
+SENTENCES_PER_SECOND = Gauge('nmt_sentences_per_second', '가장 최근 배치의 초당 번역 문장 수')
+TOKENS_PER_SECOND = Gauge('nmt_tokens_per_second', '가장 최근 배치의 초당 입력 토큰 수')
+SUBTITLE_CUES = Counter('nmt_subtitle_cues_total', '번역한 자막 파일의 자막 수')
+SUBTITLE_SEQUENCES = Counter('nmt_subtitle_sequences_total',
+                             '자막 번역에서 모델로 보낸 번역 단위 수(merge 사용 시 자막 수보다 적음)')
+QUEUE_DEPTH = Gauge('nmt_queue_depth', '번역을 기다리는 문장 수')
@@ -0,0 +1,85 @@
+""" 문서를 번역 배치로 나누고 번역 결과를 다시 라인 단위로 합치는 플래너 """
+import asyncio
+import time
+from collections import deque
+
+from metrics import STAGE_SECONDS
+
+
+def plan_document(lines, sent_parser, max_len=255):
+    """
+    라인마다 (라인, 번역 단위 리스트)를 반환합니다.
+    max_len보다 긴 라인은 문장 단위로, 나머지 라인은 라인 전체를 하나의 단위로 번역하고, 빈 라인은 번역하지 않습니다(None).
+    """
+    for line in lines:
+        if len(line) > max_len:
+            start = time.perf_counter()
+            sents = sent_parser.parse(line)
+            STAGE_SECONDS.observe(time.perf_counter() - start, stage='split')
+            yield line, sents
+        elif line.strip():
+            yield line, [line]
+        else:
+            yield line, None
+
+
+async def translate_document(lines, translate_fn, sent_parser, batch_size, max_len=255, lookahead=None):
+    """
+    문서를 번역해 입력 순서대로 한 라인씩 반환합니다.
+    모든 라인의 번역 단위를 라인 경계와 관계없이 batch_size개씩 묶어 translate_fn으로 번역하고,
+    긴 라인은 문장별 번역 결과를 공백으로 이어 한 라인으로 만듭니다.
+
+    Args:
+        lines (list): 번역할 라인
+        translate_fn (callable): 번역 단위 리스트를 받아 번역 결과 리스트를 반환하는 코루틴 함수
+        sent_parser: 긴 라인을 문장으로 나눌 SentenceParser
+        batch_size (int): 한 번에 translate_fn으로 보낼 최대 번역 단위 수
+        max_len (int): 문장 단위로 나누지 않고 번역할 최대 라인 길이
+        lookahead (int, optional): 끝나지 않은 번역 작업이 이만큼 쌓이면 앞의 작업이 끝나기를 기다림
+    """
+    layout = deque()  # (라인, 번역 단위 수). 번역하지 않는 라인은 단위 수가 None
+    tasks = deque()
+    targets = deque()  # 앞에서부터 끝난 번역 결과
+    units = []
+
+    def submit(batch):
+        tasks.append(asyncio.ensure_future(translate_fn(batch)))
+
+    def ready_lines():
+        while layout:
+            line, count = layout[0]
+            if count is None:
+                layout.popleft()
+                yield line
+            elif count <= len(targets):
+                layout.popleft()
+                yield ' '.join(targets.popleft() for _ in range(count))
+            else:
+                break
+
+    try:
+        for line, line_units in plan_document(lines, sent_parser, max_len):
+            if line_units is None:
+                layout.append((line, None))
+            else:
+                layout.append((line, len(line_units)))
+                units.extend(line_units)
+                while len(units) >= batch_size:
+                    submit(units[:batch_size])
+                    del units[:batch_size]
+            # 앞에서부터 끝난 결과는 바로 내보냄
+            while tasks and (tasks[0].done() or (lookahead is not None and len(tasks) > lookahead)):
+                targets.extend(await tasks.popleft())
+            for translated in ready_lines():
+                yield translated
+        if units:
+            submit(units)
+        while tasks:
+            targets.extend(await tasks.popleft())
+            for translated in ready_lines():
+                yield translated
+        for translated in ready_lines():
+            yield translated
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,137 @@
+""" 모델을 한 번만 불러온 부모 프로세스에서 서버 프로세스(replica)를 fork해 CPU 코어별로 나누어 실행하는 도구
+
+fork한 자식 프로세스는 부모가 불러온 모델 가중치 메모리를 copy-on-write로 공유하므로, replica 수만큼 모델 메모리가 늘지 않습니다.
+자식 프로세스마다 사용할 CPU 코어를 나누어 고정하고, 같은 포트를 SO_REUSEPORT로 열어 커널이 연결을 replica에 고르게 나누게 합니다.
+fork와 CPU 고정은 리눅스에서만 지원합니다.
+"""
+import gc
+import logging
+import os
+import signal
+import socket
+import time
+
+logger = logging.getLogger('nmt')
+
+PR_SET_PDEATHSIG = 1
+RESTART_DELAY = 1.0  # 비정상 종료된 replica를 다시 시작하기 전에 기다리는 시간(초)
+
+
+def split_cpus(replicas, cpus=None):
+    """
+    사용 가능한 CPU 코어를 replicas개의 연속된 묶음으로 나눕니다.
+    코어가 replica보다 적으면 여러 replica가 같은 코어를 함께 사용합니다.
+    """
+    if cpus is None:
+        cpus = sorted(os.sched_getaffinity(0))
+    if len(cpus) < replicas:
+        return [[cpus[i % len(cpus)]] for i in range(replicas)]
+    size, extra = divmod(len(cpus), replicas)
+    groups = []
+    start = 0
+    for i in range(replicas):
+        end = start + size + (1 if i < extra else 0)
+        groups.append(cpus[start:end])
+        start = end
+    return groups
+
+
+def bind_socket(host, port, reuse_port=True, backlog=2048):
+    """
+    서버 소켓을 엽니다. reuse_port가 True면 SO_REUSEPORT를 설정해 여러 프로세스가 같은 포트에 각자 소켓을 열 수 있게 합니다.
+    """
+    sock = socket.socket(socket.AF_INET6 if ':' in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _exit_with_parent():
+    """부모 프로세스가 강제 종료되면 자식 프로세스도 SIGTERM을 받도록 설정합니다. (리눅스 prctl)"""
+    try:
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.prctl(PR_SET_PDEATHSIG, signal.SIGTERM)
+    except (OSError, AttributeError):
+        pass
+
+
+def check_supported():
+    """fork 기반 replica를 실행할 수 없는 환경이면 ValueError를 발생시킵니다."""
+    if not hasattr(os, 'fork') or not hasattr(os, 'sched_setaffinity'):
+        raise ValueError("replica 실행은 fork와 CPU 고정을 지원하는 리눅스에서만 사용할 수 있습니다.")
+
+
+def run_replicas(replicas, serve_fn, host, port, cpus=None):
+    """
+    replicas개의 자식 프로세스를 fork해 serve_fn(replica 번호, 소켓, CPU 코어 리스트)을 실행하고,
+    비정상 종료된 자식 프로세스는 다시 fork합니다. SIGINT/SIGTERM을 받으면 자식 프로세스에 전달하고 모두 끝날 때까지 기다립니다.
+    serve_fn을 호출하기 전에 자식 프로세스를 해당 CPU 코어에 고정합니다.
+    """
+    check_supported()
+    reuse_port = hasattr(socket, 'SO_REUSEPORT')
+    # SO_REUSEPORT가 없으면 부모가 연 소켓 하나를 모든 replica가 함께 accept
+    shared = None if reuse_port else bind_socket(host, port, reuse_port=False)
+    groups = split_cpus(replicas, cpus)
+    # 부모가 만든 객체를 GC가 건드려 공유 메모리 페이지가 복사되지 않도록 고정
+    gc.collect()
+    gc.freeze()
+
+    def spawn(index):
+        pid = os.fork()
+        if pid:
+            return pid
+        # 자식 프로세스
+        status = 0
+        try:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            _exit_with_parent()
+            os.sched_setaffinity(0, groups[index])
+            sock = shared if shared is not None else bind_socket(host, port)
+            serve_fn(index, sock, groups[index])
+        except BaseException:
+            logger.exception(f"replica {index} 실행 실패")
+            status = 1
+        finally:
+            os._exit(status)
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    children = {}  # pid -> replica 번호
+    for index in range(replicas):
+        children[spawn(index)] = index
+        logger.info(f"replica {index} 시작 - CPU {groups[index]}")
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        index = children.pop(pid, None)
+        if index is None:
+            continue
+        if stopping:
+            logger.info(f"replica {index} 종료")
+            continue
+        logger.warning(f"replica {index}가 비정상 종료되어 다시 시작합니다. (status {status})")
+        time.sleep(RESTART_DELAY)
+        if not stopping:  # 기다리는 동안 종료 신호를 받았으면 다시 시작하지 않음
+            children[spawn(index)] = index
@@ -0,0 +1,242 @@
+""" 여러 요청의 문장을 하나의 모델 배치로 묶어 번역하는 스케줄러 """
+import asyncio
+import logging
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import BATCH_SIZE, BATCH_PADDING_RATIO, SENTENCES, TOKENS, SENTENCES_PER_SECOND, TOKENS_PER_SECOND
+
+logger = logging.getLogger('nmt')
+
+SORT_WINDOW = 16  # 길이 정렬 모드에서 함께 정렬하는 대기 문장 수 (배치 크기의 배수)
+
+_Item = namedtuple('_Item', ['source', 'future', 'length', 'seq'])
+
+
+class BatchScheduler:
+    """
+    요청들이 넣은 문장을 공유 큐에 모았다가 max_batch / max_wait_ms 정책에 따라 모델 배치로 묶어 번역합니다.
+    번역 결과는 문장을 넣은 요청의 future로 돌려주므로 배치 순서와 관계없이 요청에는 입력 순서대로 반환됩니다.
+
+    Args:
+        infer_fn (callable): 문장 리스트를 받아 같은 순서의 번역 결과 리스트를 반환하는 함수
+        max_batch (int): 한 번의 모델 호출에 넣을 최대 문장 수
+        max_wait_ms (float): 첫 문장이 들어온 뒤 배치를 채우기 위해 기다리는 최대 시간(ms)
+        workers (int): 모델 호출을 실행하는 스레드 수. 이벤트 루프는 모델 호출을 기다리지 않음
+        length_fn (callable, optional): 문장 리스트의 토큰 길이 리스트를 반환하는 함수. 패딩 비율 계산에 사용.
+            이벤트 루프를 막지 않도록 submit에서 전용 스레드 하나로 실행
+        sort_by_length (bool): 대기 중인 문장을 토큰 길이로 정렬해 비슷한 길이끼리 배치를 구성할지 여부
+        max_batch_tokens (int, optional): 배치의 패딩 포함 토큰 수(가장 긴 문장의 토큰 수 x 문장 수) 상한.
+            지정하면 max_batch와 함께 적용되며 length_fn이 필요함
+    """
+
+    def __init__(self, infer_fn, max_batch=8, max_wait_ms=5.0, workers=1, length_fn=None, sort_by_length=False,
+                 max_batch_tokens=None):
+        if max_batch_tokens and length_fn is None:
+            raise ValueError("max_batch_tokens를 사용하려면 length_fn이 필요합니다.")
+        self.infer_fn = infer_fn
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self.workers = workers
+        self.length_fn = length_fn
+        self.sort_by_length = sort_by_length and length_fn is not None
+        self.max_batch_tokens = max_batch_tokens or None
+        self._queue = None
+        self._pending = []  # 큐에서 꺼냈지만 아직 배치에 들어가지 못한 문장
+        self._seq = 0
+        self._worker = None
+        self._executor = None
+        self._length_executor = None
+        self._tasks = set()
+        self.batches = 0
+        self.sentences = 0
+        self.real_tokens = 0
+        self.padded_tokens = 0
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='nmt-infer')
+        # 토크나이저는 여러 스레드에서 동시에 호출하면 안전하지 않으므로 스레드 하나에서만 실행
+        self._length_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='nmt-length')
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        for task in list(self._tasks):
+            task.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._length_executor.shutdown(wait=False, cancel_futures=True)
+        # 처리되지 못한 문장의 요청은 취소
+        for item in self._pending:
+            item.future.cancel()
+        self._pending = []
+        while not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            future.cancel()
+
+    @property
+    def depth(self):
+        """번역을 기다리는 문장 수"""
+        return (self._queue.qsize() if self._queue is not None else 0) + len(self._pending)
+
+    async def submit(self, sources):
+        """문장들을 큐에 넣고 번역 결과를 입력 순서대로 반환합니다."""
+        loop = asyncio.get_running_loop()
+        if self.length_fn is not None and sources:
+            lengths = await loop.run_in_executor(self._length_executor, self.length_fn, sources)
+        else:
+            lengths = [None] * len(sources)
+        futures = []
+        for source, length in zip(sources, lengths):
+            future = loop.create_future()
+            self._queue.put_nowait((source, future, length))
+            futures.append(future)
+        return await asyncio.gather(*futures)
+
+    async def _receive(self, limit):
+        loop = asyncio.get_running_loop()
+        items = []
+        if self._pending:
+            # 이미 대기 중인 문장이 있으면 기다리지 않고 큐에 쌓인 문장만 가져옴
+            item = None
+            deadline = loop.time()
+        else:
+            item = await self._queue.get()
+            deadline = loop.time() + self.max_wait_ms / 1000
+        while True:
+            if item is not None and not item[1].done():  # 요청이 취소된 문장은 번역하지 않음
+                items.append(item)
+            if len(items) >= limit:
+                break
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+        return items
+
+    async def _collect(self):
+        window = self.max_batch * SORT_WINDOW if self.sort_by_length else self.max_batch
+        items = await self._receive(window - len(self._pending))
+        for source, future, length in items:
+            self._pending.append(_Item(source, future, length, self._seq))
+            self._seq += 1
+        self._pending = [item for item in self._pending if not item.future.done()]
+
+        if not self.sort_by_length:
+            first = 0
+        else:
+            # 비슷한 길이의 문장끼리 묶되, 가장 오래 기다린 문장은 항상 이번 배치에 포함
+            self._pending.sort(key=lambda item: item.length)
+            first = min(range(len(self._pending)), key=lambda i: self._pending[i].seq, default=0)
+        start, end = self._span(first)
+        batch = self._pending[start:end]
+        del self._pending[start:end]
+        return batch
+
+    def _fits(self, count, longest):
+        if count > self.max_batch:
+            return False
+        return self.max_batch_tokens is None or count * longest <= self.max_batch_tokens
+
+    def _span(self, first):
+        """pending[first]를 포함하고 배치 크기와 토큰 상한을 넘지 않는 구간 [start, end)를 구합니다."""
+        if not self._pending:
+            return 0, 0
+        pending = self._pending
+        start, end = first, first + 1
+        longest = pending[first].length or 0
+
+        def grow_left(limit):
+            nonlocal start, longest
+            while start > limit and self._fits(end - start + 1, max(longest, pending[start - 1].length or 0)):
+                start -= 1
+                longest = max(longest, pending[start].length or 0)
+
+        # 정렬된 경우 앞쪽(짧은 문장)을 배치의 절반까지 먼저 채우고, 뒤쪽, 남은 앞쪽 순으로 채움
+        grow_left(max(0, first - self.max_batch // 2))
+        while end < len(pending) and self._fits(end - start + 1, max(longest, pending[end].length or 0)):
+            longest = max(longest, pending[end].length or 0)
+            end += 1
+        grow_left(0)
+        return start, end
+
+    async def _run(self):
+        slots = asyncio.Semaphore(self.workers)
+        while True:
+            # 모든 스레드가 모델을 실행 중이면 그동안 큐에 문장이 더 쌓이도록 배치 구성을 미룸
+            await slots.acquire()
+            try:
+                batch = await self._collect()
+            except asyncio.CancelledError:
+                slots.release()
+                raise
+            if not batch:
+                slots.release()
+                continue
+            task = asyncio.create_task(self._dispatch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            task.add_done_callback(lambda _: slots.release())
+
+    def _account(self, batch):
+        self.batches += 1
+        self.sentences += len(batch)
+        BATCH_SIZE.observe(len(batch))
+        if self.length_fn is None:
+            logger.debug(f"batch size: {len(batch)}, queue depth: {self.depth}")
+            return
+        lengths = [item.length for item in batch]
+        padded = max(lengths) * len(lengths)
+        self.real_tokens += sum(lengths)
+        self.padded_tokens += padded
+        BATCH_PADDING_RATIO.observe(1 - sum(lengths) / padded)
+        logger.debug(f"batch size: {len(batch)}, padding ratio: {1 - sum(lengths) / padded:.3f}, "
+                     f"queue depth: {self.depth}")
+
+    async def _dispatch(self, batch):
+        loop = asyncio.get_running_loop()
+        sources = [item.source for item in batch]
+        self._account(batch)
+        start = time.perf_counter()
+        try:
+            targets = await loop.run_in_executor(self._executor, self.infer_fn, sources)
+        except Exception as e:
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+        elapsed = time.perf_counter() - start
+        SENTENCES.inc(len(batch))
+        SENTENCES_PER_SECOND.set(len(batch) / elapsed if elapsed > 0 else 0)
+        if self.length_fn is not None:
+            tokens = sum(item.length for item in batch)
+            TOKENS.inc(tokens)
+            TOKENS_PER_SECOND.set(tokens / elapsed if elapsed > 0 else 0)
+        for item, target in zip(batch, targets):
+            if not item.future.done():
+                item.future.set_result(target)
+
+    def stats(self):
+        """배치 구성 통계. padding_ratio는 배치 패딩으로 낭비된 토큰의 비율"""
+        return {
+            'batches': self.batches,
+            'sentences': self.sentences,
+            'avg_batch_size': self.sentences / self.batches if self.batches else 0.0,
+            'padding_ratio': 1 - self.real_tokens / self.padded_tokens if self.padded_tokens else 0.0,
+            'avg_batch_tokens': self.padded_tokens / self.batches if self.batches else 0.0,
+            'queue_depth': self.depth,
+        }
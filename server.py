@@ -1,23 +1,141 @@
-import os.path
+import time
+STARTED = time.perf_counter()  # 서버 시작 시간 측정 기준
 
-from fastapi import FastAPI
-from pydantic import BaseModel
-from transformers import pipeline, T5TokenizerFast
-from transformers.pipelines.pt_utils import KeyDataset
-from datasets import Dataset
+import os.path
+import asyncio
+import codecs
+import copy
+import json
+import uuid
+from collections import deque
+from contextlib import asynccontextmanager
+
+from typing import Any, List, Optional
+
+from fastapi import FastAPI, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse, JSONResponse, PlainTextResponse, FileResponse
+from pydantic import BaseModel, ValidationError
 from argparse import ArgumentParser
-import torch
-from text_parser import SentenceParser
+from text_parser import SentenceParser, StreamingSentenceParser
+from engine import load_engine, load_tokenizer, set_num_threads, PRECISIONS, BACKENDS
+from scheduler import BatchScheduler
+from planner import translate_document
+from translation_memory import TranslationMemory
+from jobs import JobManager, JobQueueFull
+from prefork import run_replicas, check_supported, bind_socket
+import metrics
 from subtitle_utils import *
 import logging
 
+HOST = "127.0.0.1"
 MAX_TEXT_LEN = 1000000  # 클라이언트 요청 당 가능한 텍스트 길이
 MAX_INPUT_LEN = 255  # 한 라인당 최대 토큰 수
-
-tokenizer_name = "paust/pko-t5-base"
-tokenizer = T5TokenizerFast.from_pretrained(tokenizer_name)
-
-app = FastAPI()
+MAX_BULK_ITEMS = 1000  # 일괄 번역 요청 당 가능한 문서 수
+STREAM_LOOKAHEAD = 64  # 스트리밍 번역 시 결과를 내보내기 전에 미리 요청해 두는 최대 번역 작업 수
+MAX_SUBTITLE_BYTES = 64 * 1024 * 1024  # 업로드할 수 있는 자막 파일의 최대 크기
+SUBTITLE_MEDIA_TYPES = {'srt': 'application/x-subrip; charset=utf-8', 'vtt': 'text/vtt',
+                        'smi': 'application/x-sami; charset=utf-8'}
+# 요청 수와 처리 시간을 기록하는 엔드포인트
+METRIC_ENDPOINTS = {'/translate', '/translate/stream', '/translate/raw', '/translate/bulk', '/pdf', '/subtitle',
+                    '/subtitle/upload', '/subtitle/jobs'}
+
+# 워밍업에 사용하는 프롬프트별 문장
+WARMUP_SENTS = {
+    "E2K, FRM: ": "This model is an English-Korean translation model.",
+    "E2K: ": "This model is an English-Korean translation model.",
+    "E2K, NRM: ": "This model is an English-Korean translation model.",
+    "K2E: ": "이 모델은 영어-한국어 번역 모델입니다.",
+}
+
+engine = None
+scheduler = None
+memory = None
+jobs = None
+replica = None  # replica로 실행할 때 이 프로세스의 replica 번호
+jobs_run_id = None  # replica들이 함께 쓰는 작업 테이블에서 이번 서버 실행을 구분하는 id
+ready = False
+startup_timings = {}  # 서버 시작 단계별 소요 시간(초)
+
+
+def load_model():
+    """토크나이저와 번역 모델을 불러옵니다."""
+    global length_tokenizer
+    start = time.perf_counter()
+    tokenizer = load_tokenizer(args.model)
+    # 모델 스레드와 토크나이저를 동시에 쓰지 않도록 길이 계산용 토크나이저를 따로 둠
+    length_tokenizer = copy.deepcopy(tokenizer)
+    startup_timings['tokenizer'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    # GPU가 있으면 GPU를, 없으면 CPU를 이용해 번역엔진 구동
+    model = load_engine(args.model, tokenizer, max_batch=args.batch, max_length=MAX_INPUT_LEN,
+                        precision=args.precision, backend=args.backend)
+    startup_timings['model'] = time.perf_counter() - start
+    return model
+
+
+async def startup():
+    """모델을 불러오고 프롬프트별로 워밍업한 뒤 요청을 받기 시작합니다."""
+    global engine, scheduler, ready
+    loop = asyncio.get_running_loop()
+    try:
+        if engine is None:
+            engine = await loop.run_in_executor(None, load_model)
+        # 동시에 들어온 요청들의 문장을 모아 배치 단위로 번역
+        scheduler = BatchScheduler(engine.translate, max_batch=args.batch, max_wait_ms=args.max_wait_ms,
+                                   workers=args.workers, length_fn=token_lengths,
+                                   sort_by_length=args.sort_by_length, max_batch_tokens=args.max_batch_tokens)
+        scheduler.start()
+
+        start = time.perf_counter()
+        for _ in range(args.warmup):
+            for prompt, sent in WARMUP_SENTS.items():
+                await scheduler.submit([prompt + sent] * args.batch)
+        startup_timings['warmup'] = time.perf_counter() - start
+    except Exception:
+        logger.exception("번역 엔진을 시작하지 못했습니다.")
+        return
+    startup_timings['total'] = time.perf_counter() - STARTED
+    ready = True
+    if jobs is not None:
+        await jobs.start()
+    logger.info("번역 엔진 준비 완료 - " + ', '.join(f"{k}: {v:.2f}s" for k, v in startup_timings.items()))
+
+
+async def require_ready():
+    if not ready:
+        raise HTTPException(status_code=503, detail='번역 엔진을 준비 중입니다.')
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # 모델을 불러오는 동안에도 /ready 요청에 응답할 수 있도록 백그라운드에서 시작
+    loader = asyncio.create_task(startup())
+    yield
+    loader.cancel()
+    if jobs is not None:
+        await jobs.stop()
+    if scheduler is not None:
+        await scheduler.stop()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.middleware("http")
+async def record_request(request: Request, call_next):
+    endpoint = request.url.path
+    if endpoint not in METRIC_ENDPOINTS:
+        return await call_next(request)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        metrics.REQUESTS.inc(endpoint=endpoint, status=status)
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint)
 
 
 # 로거 생성
@@ -66,75 +184,77 @@ class TranslatedText(BaseModel):
     translated_text: str
 
 
+class BulkTranslationInput(BaseModel):
+    items: List[Any]  # 번역할 문서 목록. 각 문서는 TranslationInput 형식이며, 형식이 잘못된 문서는 해당 결과의 error로 알림
+
+
+class BulkTranslatedItem(BaseModel):
+    translated_text: str
+    error: str
+
+
+class BulkTranslatedText(BaseModel):
+    results: List[BulkTranslatedItem]
+
+
 class SubtitleInput(BaseModel):
     sl: str  # source 언어
     tl: str  # target 언어
     filename: str
+    merge: bool = False  # 한 문장이 나뉜 자막을 합쳐서 번역한 뒤 원래 자막 시간에 나누어 넣음
 
 
 class SubtitleOutput(BaseModel):
     output: str
     error: str
+    cues: int = 0  # 자막 수
+    sequences: int = 0  # 모델로 보낸 번역 단위 수 (merge를 사용하지 않으면 자막 수와 같음)
 
 
-def split_text_by_words(text):
-    words = text.split()
-    substrings = []
-    current_substring = ""
-
-    for word in words:
-        if len(current_substring) + len(word) + 1 <= 255:
-            current_substring += word + " "
-        else:
-            substrings.append(current_substring.strip())
-            current_substring = word + " "
+class SubtitleJob(BaseModel):
+    job_id: str
+    status: str  # queued, running, done, failed, cancelled
+    done: int  # 번역을 마친 자막 수
+    total: int  # 전체 자막 수
+    eta: Optional[float]  # 남은 시간(초) 추정치
+    output: str
+    error: str
 
-    if current_substring:
-        substrings.append(current_substring.strip())
 
-    return substrings
+def token_lengths(sources):
+    """배치 정렬과 패딩 비율 계산에 쓰는 문장별 토큰 수"""
+    encoded = length_tokenizer(sources)
+    return [len(ids) for ids in encoded['input_ids']]
 
 
-def load_data(g):
-    dataset = Dataset.from_generator(g)
-    return dataset
+async def translate_sents(prompt, sents):
+    if memory is not None:
+        targets = await memory.translate(prompt, sents, scheduler.submit)
+    else:
+        targets = await scheduler.submit([prompt + sent.strip() for sent in sents])
 
+    for src, tgt in zip(sents, targets):
+        logger.debug(src.strip() + '\n' + tgt + '\n')
+    return targets
 
-def translate_sents(prompt, sents):
-    sources = []
 
-    def generator():
-        for source in sources:
-            yield {'src': source.strip()}
+def make_prompt(tl, hn):
+    if tl == "ko":
+        if hn in ['Y', 'y']:
+            return "E2K, FRM: "  # 영어->한국어, 존댓말
+        return "E2K: "
+    return "K2E: "
 
-    for sent in sents:
-        sources.append(prompt + sent.strip())
-    if len(sources) > 1:
-        dataset = load_data(generator)
-        targets = translator(KeyDataset(dataset, 'src'), batch_size=len(sents))
-        targets = [t[0] for t in targets]
-    else:
-        targets = translator(sources, batch_size=len(sents))
 
-    for src, tgt in zip(sources, targets):
-        logger.debug(src.replace(prompt, '') + '\n' + tgt["translation_text"] + '\n')
-    return targets
+def translate_lines(prompt, lines, lookahead=None):
+    """라인을 번역해 입력 순서대로 하나씩 반환하는 비동기 제너레이터"""
+    return translate_document(lines, lambda sents: translate_sents(prompt, sents), SentenceParser(),
+                              args.batch, max_len=MAX_INPUT_LEN, lookahead=lookahead)
 
 
-@app.post("/translate", response_model=TranslatedText)
+@app.post("/translate", response_model=TranslatedText, dependencies=[Depends(require_ready)])
 async def translate_text(input_data: TranslationInput):
-
-    def add_result(inputs):
-        ts = translate_sents(prompt, inputs)
-        result.extend([t["translation_text"] for t in ts])
-
-    if input_data.tl == "ko":
-        if input_data.hn in ['Y', 'y']:
-            prompt = "E2K, FRM: "  # 영어->한국어, 존댓말
-        else:
-            prompt = "E2K: "
-    else:
-        prompt = "K2E: "
+    prompt = make_prompt(input_data.tl, input_data.hn)
 
     text = input_data.q
     if not text.strip():
@@ -142,116 +262,398 @@ async def translate_text(input_data: TranslationInput):
     if len(text) > MAX_TEXT_LEN:
         text = text[:MAX_TEXT_LEN]
     lines = text.splitlines()
-    result = []
-    batch = []
-    sent_parser = SentenceParser()
-    for line in lines:
-        if len(line) > MAX_INPUT_LEN:
-            if len(batch) > 0:
-                add_result(batch)
-                batch = []
-            # sents = split_text(line, input_data.tl)
-            sents = sent_parser.parse(line)
-            targets = translate_sents(prompt, sents)
-            sents = [target["translation_text"] for target in targets]
-            result.append(' '.join(sents))
-        else:
-            if line.strip():
-                batch.append(line)
-                if len(batch) == args.batch:
-                    add_result(batch)
-                    batch = []
-            else:
-                if len(batch) > 0:
-                    add_result(batch)
-                    batch = []
-                result.append(line)
-
-    if len(batch) > 0:
-        add_result(batch)
+    result = [line async for line in translate_lines(prompt, lines)]
     result = '\n'.join(result)
     return TranslatedText(translated_text=result)
 
 
-@app.post("/pdf", response_model=TranslatedText)
-async def translate_pdf(input_data: TranslationInput):
-
-    def add_result(inputs):
-        ts = translate_sents(prompt, inputs)
-        result.extend([t["translation_text"] for t in ts])
+@app.post("/translate/stream", dependencies=[Depends(require_ready)])
+async def translate_text_stream(input_data: TranslationInput, fmt: str = 'ndjson'):
+    """
+    번역이 끝난 라인부터 순서대로 내보냅니다.
+    fmt='ndjson'이면 라인마다 {"translated_text": ...} JSON을 한 줄씩, fmt='sse'면 Server-Sent Events로 보냅니다.
+    """
+    prompt = make_prompt(input_data.tl, input_data.hn)
+    text = input_data.q
+    if len(text) > MAX_TEXT_LEN:
+        text = text[:MAX_TEXT_LEN]
+    lines = text.splitlines()
 
-    if input_data.tl == "ko":
-        if input_data.hn in ['Y', 'y']:
-            prompt = "E2K, FRM: "  # 영어->한국어, 존댓말
+    async def events():
+        async for line in translate_lines(prompt, lines, lookahead=STREAM_LOOKAHEAD):
+            data = json.dumps({'translated_text': line}, ensure_ascii=False)
+            if fmt == 'sse':
+                yield 'data: ' + data + '\n\n'
+            else:
+                yield data + '\n'
+        if fmt == 'sse':
+            yield 'event: end\ndata: {}\n\n'
+
+    media_type = 'text/event-stream' if fmt == 'sse' else 'application/x-ndjson'
+    return StreamingResponse(events(), media_type=media_type)
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    요청 본문을 읽으면서 응답을 보내는 StreamingResponse.
+    StreamingResponse는 응답을 보내는 동안 연결 종료를 감지하려고 요청 메시지를 대신 읽어 버리므로,
+    연결 종료는 엔드포인트의 request.stream()에서 감지합니다.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+
+@app.post("/translate/raw", dependencies=[Depends(require_ready)])
+async def translate_raw_stream(request: Request, sl: str = 'en', tl: str = 'ko', hn: str = 'N', fmt: str = 'ndjson'):
+    """
+    요청 본문의 UTF-8 텍스트를 받는 대로 문장 단위로 나누어 번역하고, 번역이 끝난 문장부터 순서대로 내보냅니다.
+    본문을 모두 받기 전에 번역을 시작하므로 큰 문서를 chunked 전송으로 보낼 때 읽기와 번역이 겹쳐 진행됩니다.
+    문장마다 {"translated_text": ...}를 보내며, 빈 문자열은 문단 구분입니다. fmt는 /translate/stream과 같습니다.
+    """
+    prompt = make_prompt(tl, hn)
+    tasks = asyncio.Queue(maxsize=STREAM_LOOKAHEAD)  # 번역 작업이 쌓이면 본문 읽기를 멈춤
+
+    async def translate_batch(sents):
+        sources = [sent for sent in sents if sent.strip()]
+        targets = iter(await translate_sents(prompt, sources) if sources else [])
+        return [next(targets) if sent.strip() else '' for sent in sents]
+
+    async def submit(sents):
+        for i in range(0, len(sents), args.batch):
+            await tasks.put(asyncio.ensure_future(translate_batch(sents[i:i + args.batch])))
+
+    async def read_body():
+        sent_parser = StreamingSentenceParser()
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        received = 0
+        try:
+            async for chunk in request.stream():
+                text = decoder.decode(chunk)[:MAX_TEXT_LEN - received]
+                received += len(text)
+                await submit(sent_parser.feed(text))
+                if received >= MAX_TEXT_LEN:
+                    break
+            await submit(sent_parser.feed(decoder.decode(b'', final=True)[:MAX_TEXT_LEN - received]))
+            await submit(sent_parser.close())
+        finally:
+            await tasks.put(None)
+
+    async def events():
+        reader = asyncio.ensure_future(read_body())
+        try:
+            while True:
+                task = await tasks.get()
+                if task is None:
+                    break
+                for target in await task:
+                    data = json.dumps({'translated_text': target}, ensure_ascii=False)
+                    if fmt == 'sse':
+                        yield 'data: ' + data + '\n\n'
+                    else:
+                        yield data + '\n'
+            await reader
+            if fmt == 'sse':
+                yield 'event: end\ndata: {}\n\n'
+        finally:
+            reader.cancel()
+            while not tasks.empty():
+                task = tasks.get_nowait()
+                if task is not None:
+                    task.cancel()
+
+    media_type = 'text/event-stream' if fmt == 'sse' else 'application/x-ndjson'
+    return DuplexStreamingResponse(events(), media_type=media_type)
+
+
+@app.post("/translate/bulk", response_model=BulkTranslatedText, dependencies=[Depends(require_ready)])
+async def translate_bulk(input_data: BulkTranslationInput):
+    """여러 문서를 함께 번역합니다. 모든 문서의 문장이 같은 모델 배치로 묶이며, 결과는 요청한 순서대로 반환됩니다."""
+    tasks = []
+    total_len = 0
+    for i, item in enumerate(input_data.items):
+        if i >= MAX_BULK_ITEMS:
+            tasks.append(ValueError('요청 당 가능한 문서 수를 초과했습니다.'))
+            continue
+        if not isinstance(item, dict):
+            tasks.append(ValueError('잘못된 입력입니다: 문서는 객체여야 합니다.'))
+            continue
+        try:
+            item = TranslationInput(**item)
+        except ValidationError as e:
+            fields = ', '.join(dict.fromkeys(str(error['loc'][0]) for error in e.errors() if error['loc']))
+            tasks.append(ValueError(f'잘못된 입력입니다: {fields}'))
+            continue
+        total_len += len(item.q)
+        if total_len > MAX_TEXT_LEN:
+            tasks.append(ValueError('요청 당 가능한 텍스트 길이를 초과했습니다.'))
         else:
-            prompt = "E2K: "
-    else:
-        prompt = "K2E: "
+            tasks.append(asyncio.ensure_future(translate_text(item)))
+
+    results = []
+    try:
+        for task in tasks:
+            if isinstance(task, Exception):
+                results.append(BulkTranslatedItem(translated_text='', error=str(task)))
+                continue
+            try:
+                translated = await task
+                results.append(BulkTranslatedItem(translated_text=translated.translated_text, error=''))
+            except Exception as e:
+                logger.error(f"일괄 번역 실패: {e}")
+                results.append(BulkTranslatedItem(translated_text='', error=str(e)))
+    finally:
+        for task in tasks:
+            if not isinstance(task, Exception):
+                task.cancel()
+    return BulkTranslatedText(results=results)
+
+
+@app.post("/pdf", response_model=TranslatedText, dependencies=[Depends(require_ready)])
+async def translate_pdf(input_data: TranslationInput):
+    prompt = make_prompt(input_data.tl, input_data.hn)
 
     text = input_data.q
     if not text.strip():
         return TranslatedText(translated_text=input_data.q)
 
-    pdf_parser = SentenceParser()
     lines = text.splitlines()
-    result = []
-    batch = []
-    for line in lines:
-        if len(line) > MAX_INPUT_LEN:
-            if len(batch) > 0:
-                add_result(batch)
-                batch = []
-            # sents = split_text(line, input_data.tl)
-            sents = pdf_parser.parse(line)
-            targets = translate_sents(prompt, sents)
-            sents = [target["translation_text"] for target in targets]
-            result.append(' '.join(sents))
-        else:
-            if line.strip():
-                batch.append(line)
-                if len(batch) == args.batch:
-                    add_result(batch)
-                    batch = []
-            else:
-                if len(batch) > 0:
-                    add_result(batch)
-                    batch = []
-                result.append(line)
-
-    if len(batch) > 0:
-        add_result(batch)
+    result = [line async for line in translate_lines(prompt, lines)]
     result = [line.replace('\n', '') for line in result]
     result = '\n'.join(result).strip()
     return TranslatedText(translated_text=result)
 
 
-@app.post("/subtitle", response_model=SubtitleOutput)
+@app.get("/ready")
+async def readiness():
+    """모델 로딩과 워밍업이 끝났으면 200, 아직이면 503을 반환합니다."""
+    content = {'ready': ready, 'startup': startup_timings}
+    return JSONResponse(content=content, status_code=200 if ready else 503)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def export_metrics():
+    """Prometheus 형식의 서버 지표"""
+    return PlainTextResponse(metrics.render(), media_type='text/plain; version=0.0.4')
+
+
+@app.get("/stats")
+async def stats():
+    return {'replica': replica,
+            'translation_memory': memory.stats() if memory is not None else None,
+            'scheduler': scheduler.stats() if scheduler is not None else None,
+            'jobs': await jobs.stats() if jobs is not None else None}
+
+
+async def translate_cues(sources, times, tl, name, progress=None, merge=False):
+    """
+    자막 텍스트를 번역해 (자막별 번역 결과, 번역 단위 수)를 반환합니다.
+    progress를 지정하면 번역 배치가 끝날 때마다 (번역한 자막 수, 전체 자막 수)로 호출합니다.
+    merge가 True면 한 문장이 나뉜 자막을 합쳐서 번역하고 번역 결과를 원래 자막에 나누어 넣습니다.
+    """
+    if tl == 'en':
+        prompt = "K2E: "
+    else:
+        prompt = "E2K, NRM: "
+
+    units = subtitle_units(sources, times, merge)
+    unit_sources = [text for text, _ in units]
+    # 번역 단위 i개를 마쳤을 때 번역한 자막 수
+    cues_done = [0]
+    for _, cues in units:
+        cues_done.append(cues_done[-1] + len(cues))
+
+    # 다른 요청이 기다리지 않도록 STREAM_LOOKAHEAD개의 배치까지만 미리 요청
+    chunks = deque()
+    unit_targets = []
+    try:
+        for i in range(0, len(unit_sources), args.batch):
+            chunks.append(asyncio.ensure_future(translate_sents(prompt, unit_sources[i:i + args.batch])))
+            if len(chunks) >= STREAM_LOOKAHEAD:
+                unit_targets += await chunks.popleft()
+                if progress is not None:
+                    progress(cues_done[len(unit_targets)], len(sources))
+        while chunks:
+            unit_targets += await chunks.popleft()
+            if progress is not None:
+                progress(cues_done[len(unit_targets)], len(sources))
+    finally:
+        for chunk in chunks:
+            chunk.cancel()
+
+    assert len(unit_sources) == len(unit_targets)
+    metrics.SUBTITLE_CUES.inc(len(sources))
+    metrics.SUBTITLE_SEQUENCES.inc(len(units))
+    logger.info(f"{name}: 자막 {len(sources)}개를 번역 단위 {len(units)}개로 번역 "
+                f"({len(sources) - len(units)}개 절약)")
+    return distribute_translations(sources, units, unit_targets), len(units)
+
+
+async def translate_subtitle_file(filename, tl, progress=None, merge=False):
+    """
+    자막 파일을 번역해 같은 디렉토리에 '_<tl>'을 붙인 이름으로 저장하고 (저장한 파일 경로, 자막 수, 번역 단위 수)를 반환합니다.
+    progress, merge는 translate_cues와 같습니다.
+    """
+    sources, times = await asyncio.to_thread(subtitle_captions, filename)
+    if sources is None:
+        raise ValueError('자막 읽기 실패')
+    targets, sequences = await translate_cues(sources, times, tl, filename, progress, merge)
+    output = await asyncio.to_thread(save_translation, translated_filename(filename, tl), sources, targets, times)
+    return output, len(sources), sequences
+
+
+async def run_subtitle_job(params, progress):
+    output, _, _ = await translate_subtitle_file(params['filename'], params['tl'], progress,
+                                                 merge=params.get('merge', False))
+    return output
+
+
+def job_response(job):
+    return SubtitleJob(job_id=job['id'], status=job['status'], done=job['done'], total=job['total'],
+                       eta=job['eta'], output=job['output'], error=job['error'])
+
+
+@app.post("/subtitle", response_model=SubtitleOutput, dependencies=[Depends(require_ready)])
 async def translate_subtitle(input_data: SubtitleInput):
     filename = input_data.filename
     if not os.path.exists(filename):
         return SubtitleOutput(output='', error='자막 파일이 존재하지 않습니다.')
-    sources, times = subtitle_captions(filename)
-    if sources is None:
-        return SubtitleOutput(output='', error='자막 읽기 실패')
-    if input_data.tl == 'en':
-        prompt = "K2E: "
-    else:
-        prompt = "E2K, NRM: "
-    targets = []
-    for i in range(0, len(sources), args.batch):
-        batch = sources[i:i + args.batch]
-        target = translate_sents(prompt, batch)
-        target = [t["translation_text"] for t in target]
-        targets.extend(target)
-
-    assert len(sources) == len(targets)
-    ext = file_ext(filename)
-    output = filename.replace(ext, '_' + input_data.tl + ext)
-    if ext == '.srt':
-        save_to_srt(output, targets, times)
+    try:
+        output, cues, sequences = await translate_subtitle_file(filename, input_data.tl, merge=input_data.merge)
+    except ValueError as e:
+        return SubtitleOutput(output='', error=str(e))
+    return SubtitleOutput(output=output, error='', cues=cues, sequences=sequences)
+
+
+@app.post("/subtitle/upload", dependencies=[Depends(require_ready)])
+async def translate_subtitle_upload(request: Request, tl: str = 'ko', sf: Optional[str] = None,
+                                    fmt: Optional[str] = None, merge: bool = False):
+    """
+    요청 본문으로 받은 자막 파일을 번역해 번역한 자막 파일을 응답 본문으로 바로 반환합니다. 서버에 파일을 만들지 않습니다.
+    sf는 입력 자막 형식(srt, vtt, smi, sbv)으로, 지정하지 않으면 내용으로 추정합니다.
+    fmt는 출력 형식(srt, vtt, smi)으로, 지정하지 않으면 입력 형식과 같습니다(sbv는 srt).
+    응답 헤더 X-Subtitle-Cues, X-Subtitle-Sequences에 자막 수와 모델로 보낸 번역 단위 수를 담습니다.
+    """
+    length = request.headers.get('content-length')
+    if length is not None and length.isdigit() and int(length) > MAX_SUBTITLE_BYTES:
+        raise HTTPException(status_code=413, detail='자막 파일이 너무 큽니다.')
+    raw = await request.body()
+    if len(raw) > MAX_SUBTITLE_BYTES:
+        raise HTTPException(status_code=413, detail='자막 파일이 너무 큽니다.')
+    sf = sf or subtitle_format(raw)
+    if sf not in ('srt', 'vtt', 'smi', 'sbv'):
+        raise HTTPException(status_code=400, detail='자막 형식을 알 수 없습니다.')
+    fmt = fmt or ('srt' if sf == 'sbv' else sf)
+    if fmt not in SUBTITLE_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 출력 형식입니다: {fmt}")
+
+    try:
+        sources, times = await asyncio.to_thread(subtitle_captions_from_bytes, raw, sf)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"자막 읽기 실패 - {e}")
+    del raw
+    targets, sequences = await translate_cues(sources, times, tl, 'upload', merge=merge)
+    content = await asyncio.to_thread(format_translation, fmt, sources, targets, times)
+    headers = {'Content-Disposition': f'attachment; filename="subtitle_{tl}.{fmt}"',
+               'X-Subtitle-Cues': str(len(sources)), 'X-Subtitle-Sequences': str(sequences)}
+    return Response(content=content, media_type=SUBTITLE_MEDIA_TYPES[fmt], headers=headers)
+
+
+@app.post("/subtitle/jobs", response_model=SubtitleJob, dependencies=[Depends(require_ready)])
+async def submit_subtitle_job(input_data: SubtitleInput):
+    """자막 번역 작업을 대기열에 넣고 바로 작업 상태를 반환합니다."""
+    if not os.path.exists(input_data.filename):
+        raise HTTPException(status_code=404, detail='자막 파일이 존재하지 않습니다.')
+    try:
+        job = await jobs.submit(filename=input_data.filename, sl=input_data.sl, tl=input_data.tl,
+                                merge=input_data.merge)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return job_response(job)
+
+
+@app.get("/subtitle/jobs/{job_id}", response_model=SubtitleJob)
+async def subtitle_job_status(job_id: str):
+    """작업 상태와 진행률(done/total), 남은 시간 추정치를 반환합니다."""
+    job = await jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail='작업이 존재하지 않습니다.')
+    return job_response(job)
+
+
+@app.delete("/subtitle/jobs/{job_id}", response_model=SubtitleJob)
+async def cancel_subtitle_job(job_id: str):
+    """대기 중이거나 실행 중인 작업을 취소합니다."""
+    job = await jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail='작업이 존재하지 않습니다.')
+    return job_response(job)
+
+
+@app.get("/subtitle/jobs/{job_id}/output")
+async def subtitle_job_output(job_id: str):
+    """끝난 작업의 번역된 자막 파일을 반환합니다."""
+    job = await jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail='작업이 존재하지 않습니다.')
+    if job['status'] != 'done':
+        raise HTTPException(status_code=409, detail='작업이 끝나지 않았습니다.')
+    if not os.path.exists(job['output']):
+        raise HTTPException(status_code=410, detail='번역된 자막 파일이 존재하지 않습니다.')
+    return FileResponse(job['output'], filename=os.path.basename(job['output']))
+
+
+def init_services():
+    """번역 메모리와 작업 관리자를 만듭니다. replica로 실행하면 fork한 프로세스마다 따로 만듭니다."""
+    global memory, jobs
+    # 이미 번역한 문장은 번역 메모리에서 재사용
+    if args.tm_size > 0 or args.tm_db:
+        memory = TranslationMemory(max_size=args.tm_size, ttl=args.tm_ttl, db_path=args.tm_db)
     else:
-        save_to_smi(output, times, sources, targets, 'False')
-    return SubtitleOutput(output=output, error='')
+        memory = None
+    # 자막 번역 작업은 백그라운드에서 실행하고 작업 목록은 SQLite에 보관
+    jobs = JobManager(run_subtitle_job, args.job_db, workers=args.job_workers, max_queue=args.job_queue,
+                      run_id=jobs_run_id, replica=replica or 0)
+    metrics.QUEUE_DEPTH.set_function(lambda: scheduler.depth if scheduler is not None else 0)
+    if memory is not None:
+        metrics.Counter('nmt_translation_memory_hits_total', '번역 메모리(LRU) 적중 수').set_function(lambda: memory.hits)
+        metrics.Counter('nmt_translation_memory_disk_hits_total', '번역 메모리(SQLite) 적중 수').set_function(
+            lambda: memory.disk_hits)
+        metrics.Counter('nmt_translation_memory_misses_total', '번역 메모리에 없어 모델로 번역한 문장 수').set_function(
+            lambda: memory.misses)
+        metrics.Counter('nmt_translation_memory_coalesced_total', '번역 중인 같은 문장의 결과를 기다린 수').set_function(
+            lambda: memory.coalesced)
+
+
+def load_config(path, parser):
+    """
+    autotune.py가 만든 설정 파일(JSON)을 읽어 parser의 옵션 이름과 값의 dict로 반환합니다.
+    측정 결과를 기록한 'autotune' 항목은 무시하며, parser에 없는 옵션이 있으면 ValueError를 발생시킵니다.
+    """
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+    config.pop('autotune', None)
+    options = set(vars(parser.parse_args([]))) - {'config'}
+    unknown = set(config) - options
+    if unknown:
+        raise ValueError(f"{path}에 알 수 없는 옵션이 있습니다: {', '.join(sorted(unknown))}")
+    return config
+
+
+def serve_replica(index, sock, cpus):
+    """fork한 replica 프로세스에서 cpus에 맞춰 스레드 수를 정하고 sock으로 요청을 받습니다."""
+    global replica
+    from uvicorn import Config, Server
+
+    replica = index
+    metrics.CONST_LABELS['replica'] = index
+    sockets = [sock]
+    if args.replica_port > 0:
+        # 공유 포트는 커널이 임의의 replica로 연결하므로, 지표 수집용으로 replica마다 따로 접속할 수 있는 포트를 염
+        sockets.append(bind_socket(HOST, args.replica_port + index, reuse_port=False))
+    set_num_threads(args.torch_threads if args.torch_threads > 0 else len(cpus), args.interop_threads)
+    init_services()
+    Server(Config(app)).run(sockets=sockets)
 
 
 if __name__ == "__main__":
@@ -261,17 +663,50 @@ if __name__ == "__main__":
     parser.add_argument('-p', '--port', type=int, default=5000)
     parser.add_argument('-m', '--model', type=str, default='./models/BlueT')
     parser.add_argument('-b', '--batch', type=int, default=8)
+    parser.add_argument('--backend', type=str, default='torch', choices=BACKENDS)
+    parser.add_argument('--precision', type=str, default='fp32', choices=PRECISIONS)
+    parser.add_argument('-w', '--max_wait_ms', type=float, default=5.0)
+    parser.add_argument('-t', '--workers', type=int, default=1)
+    parser.add_argument('--max_batch_tokens', type=int, default=0)
+    parser.add_argument('--sort_by_length', action='store_true')
+    parser.add_argument('--tm_size', type=int, default=100000)
+    parser.add_argument('--tm_ttl', type=float, default=0)
+    parser.add_argument('--tm_db', type=str, default=None)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--job_workers', type=int, default=1)
+    parser.add_argument('--job_queue', type=int, default=100)
+    parser.add_argument('--job_db', type=str, default='./jobs.db')
+    parser.add_argument('--replicas', type=int, default=1)
+    parser.add_argument('--replica_port', type=int, default=0)
+    parser.add_argument('--torch_threads', type=int, default=0)
+    parser.add_argument('--interop_threads', type=int, default=0)
     parser.add_argument('-l', '--log_level', type=str, default='info')
+    parser.add_argument('--config', type=str, default=None)
+    config_path = parser.parse_known_args()[0].config
+    if config_path:
+        # 설정 파일의 값은 기본값으로만 사용하고, 명령행에서 지정한 옵션이 우선함
+        parser.set_defaults(**load_config(config_path, parser))
     args = parser.parse_args()
+    startup_timings['import'] = time.perf_counter() - STARTED
     model_path = args.model
     logger = setting_log(args.log_level)
     if not os.path.exists(model_path):
         logger.error(f"{model_path}가 존재하지 않습니다.")
         raise ValueError(f"{model_path}가 존재하지 않습니다.")
-    if torch.cuda.is_available():
-        translator = pipeline("translation", model=model_path, tokenizer=tokenizer, max_length=MAX_INPUT_LEN, device="cuda")
-        # logger.info("NVIDIA GPU를 이용해 번역엔진 구동...")
+    if args.replicas > 1:
+        # 모델을 부모 프로세스에서 한 번만 불러오고, fork한 replica들이 가중치 메모리를 공유
+        check_supported()
+        if args.backend != 'torch':
+            raise ValueError("replica 실행은 torch backend에서만 사용할 수 있습니다.")
+        # 부모가 OpenMP 스레드를 만들지 않아야 fork한 자식에서 스레드 수를 다시 정할 수 있음
+        set_num_threads(1)
+        engine = load_model()
+        if engine.device != 'cpu':
+            raise ValueError("replica 실행은 CPU에서만 사용할 수 있습니다.")
+        # 다시 시작한 replica도 같은 id를 물려받아, 종료 전에 자신이 실행하던 작업만 다시 대기 상태로 되돌림
+        jobs_run_id = uuid.uuid4().hex
+        run_replicas(args.replicas, serve_replica, HOST, args.port)
     else:
-        translator = pipeline("translation", model=model_path, tokenizer=tokenizer, max_length=MAX_INPUT_LEN)
-        # logger.info("CPU를 이용해 번역엔진 구동...")
-    run(app, host="127.0.0.1", port=args.port)
+        set_num_threads(args.torch_threads, args.interop_threads)
+        init_services()
+        run(app, host=HOST, port=args.port)
@@ -98,9 +98,15 @@ class GenericParser(object):
     A generic parent class for all parsers.
     """
     def __init__(self, parse_options=None):
-        self._captions = []
+        self.track = self._new_track()
         self.parse_options = parse_options or {}
 
+    @staticmethod
+    def _new_track():
+        from subtitle.track import CaptionTrack  # subtitle.track imports this module
+
+        return CaptionTrack()
+
     def _parse(self, content):
         # method to be overwritten by child classes
         pass
@@ -109,13 +115,17 @@ class GenericParser(object):
         # method to be overwritten by child classes
         return
 
+    def _decode_content(self, raw):
+        # method to be overwritten by child classes
+        return
+
     def _validate(self, content):
         # method to be overwritten by child classes
         pass
 
     def read(self, file):
         """Reads the captions file."""
-        self._captions = []
+        self.track = self._new_track()
 
         content = self._read_content(file)
         self._validate(content)
@@ -123,9 +133,23 @@ class GenericParser(object):
 
         return self
 
+    def read_bytes(self, raw):
+        """Reads the captions from the bytes of a captions file."""
+        self.track = self._new_track()
+
+        content = self._decode_content(raw)
+        self._validate(content)
+        self._parse(content)
+
+        return self
+
     @property
     def captions(self):
-        return self._captions
+        """
+        Returns the parsed captions as Caption objects built from the track.
+        These are copies, parsers store the captions in the CaptionTrack self.track.
+        """
+        return self.track.to_captions()
 
 
 class GenericBlock(object):
@@ -1,9 +1,68 @@
 import re
 import os
 import codecs
+import mmap
 
 from subtitle.exceptions import MalformedFileError, MalformedCaptionError
 from subtitle.generic import GenericParser, Caption, Block, Style
+from subtitle.track import parse_timestamp
+
+
+MMAP_THRESHOLD = 1 << 20  # files of this size (bytes) or larger are memory-mapped
+SNIFF_BYTES = 1 << 16  # number of leading bytes inspected to guess the encoding
+
+
+def _sniff_encoding(raw):
+    """Guess between utf-8 and cp949 (a superset of euc-kr) from the start of a file without BOM."""
+    sample = bytes(raw[:SNIFF_BYTES])
+    try:
+        # a multibyte character cut at the end of the sample is not an error
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=len(raw) <= SNIFF_BYTES)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'cp949'
+
+
+def _decode(raw):
+    """
+    Decode the bytes of a caption file in one pass.
+    The BOM decides the encoding if there is one, otherwise the sniffed encoding is used.
+    If the rest of the file does not decode, the other encoding is tried, then utf-8 ignoring errors.
+    """
+    with memoryview(raw) as view:
+        if raw[:3] == codecs.BOM_UTF8:
+            return str(view[3:], 'utf-8', errors='ignore')
+        if raw[:2] == codecs.BOM_UTF16_LE:
+            return str(view[2:], 'utf-16-le', errors='ignore')
+        if raw[:2] == codecs.BOM_UTF16_BE:
+            return str(view[2:], 'utf-16-be', errors='ignore')
+
+        encoding = _sniff_encoding(raw)
+        for candidate in (encoding, 'cp949' if encoding == 'utf-8' else 'utf-8'):
+            try:
+                return str(view, candidate)
+            except UnicodeDecodeError:
+                continue
+        return str(view, 'utf-8', errors='ignore')
+
+
+def _normalize_newlines(text):
+    """Convert \\r\\n and \\r to \\n and drop leading empty lines."""
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    text = text.lstrip('\n')
+    if not text:
+        raise MalformedFileError('The file is empty.')
+    return text
+
+
+def _split_lines(text):
+    """Split text on \\n, \\r\\n and \\r, dropping leading empty lines."""
+    text = _normalize_newlines(text)
+    lines = text.split('\n')
+    if text.endswith('\n'):
+        lines.pop()
+    return lines
 
 
 class TextBasedParser(GenericParser):
@@ -17,49 +76,18 @@ class TextBasedParser(GenericParser):
     PARSER_OPTIONS = {}
 
     def _read_content(self, file):
-
-        first_bytes = min(32, os.path.getsize(file))
-        with open(file, 'rb') as f:
-            raw = f.read(first_bytes)
-
-        skip = 0
-        if raw.startswith(codecs.BOM_UTF8):
-            encoding = 'utf-8-sig'
-        elif raw.startswith(codecs.BOM_UTF16_LE):
-            encoding = 'utf-16-le'
-            skip = 2
-        elif raw.startswith(codecs.BOM_UTF16_BE):
-            encoding = 'utf-16-be'
-            skip = 2
-        else:
-            encoding = 'utf-8'
-
-        try:
-            with open(file, encoding=encoding) as f:
-                lines = [line.rstrip('\n') for line in f.readlines()]
-            if encoding in ['utf-16-le', 'utf-16-be']:
-                lines[0] = lines[0][skip-1:]
-        except UnicodeDecodeError:
-            try:
-                with open(file, encoding='euckr') as f:
-                    lines = [line.rstrip('\n') for line in f.readlines()]
-            except UnicodeDecodeError:
-                with open(file, errors='ignore') as f:
-                    lines = [line.rstrip('\n') for line in f.readlines()]
-
-        skip_lines = 0
-        for line in lines:
-            if len(line) >= 1:
-                break
-            else:
-                skip_lines += 1
-        if skip_lines > 0:
-            lines = lines[skip_lines:]
-
-        if not lines:
+        size = os.path.getsize(file)
+        if size == 0:
             raise MalformedFileError('The file is empty.')
+        with open(file, 'rb') as f:
+            if size < MMAP_THRESHOLD:
+                return self._decode_content(f.read())
+            # decode large files straight from the mapping instead of copying them into memory
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as raw:
+                return self._decode_content(raw)
 
-        return lines
+    def _decode_content(self, raw):
+        return _split_lines(_decode(raw))
 
     def _parse_timeframe_line(self, line):
         """Parse timeframe line and return start and end timestamps."""
@@ -73,8 +101,9 @@ class TextBasedParser(GenericParser):
         tf = re.match(self.TIMEFRAME_LINE_PATTERN, line)
         if tf:
             return tf
-        else:
+        elif self.TIMEFRAME_OTHER_LINE_PATTERN:  # an empty pattern would match every line
             return re.match(self.TIMEFRAME_OTHER_LINE_PATTERN, line)
+        return None
 
     def _is_timeframe_line(self, line):
         """
@@ -91,6 +120,7 @@ class TextBasedParser(GenericParser):
         return False
 
     def _parse(self, lines):
+        # the cue being read as (start_ms, end_ms, text lines), appended to the track once complete
         c = None
 
         for index, line in enumerate(lines):
@@ -102,7 +132,9 @@ class TextBasedParser(GenericParser):
                     if index >= len(lines) - 1:
                         break
                     raise MalformedCaptionError('{} in line {}'.format(e, index + 1))
-                c = Caption(start, end)
+                if c is not None and c[2]:  # cues not followed by a numbered cue, as in SBV
+                    self.track.append(c[0], c[1], '\n'.join(c[2]))
+                c = (parse_timestamp(start), parse_timestamp(end), [])
             elif self._should_skip_line(line, index, c):  # allow child classes to skip lines based on the content
                 continue
             elif line:
@@ -113,11 +145,11 @@ class TextBasedParser(GenericParser):
                     raise MalformedCaptionError(
                         'Caption missing timeframe in line {}.'.format(index + 1))
                 else:
-                    c.add_line(line)
+                    c[2].append(line)
             else:
                 if c is None:
                     continue
-                if not c.lines:
+                if not c[2]:
                     if self.PARSER_OPTIONS.get('ignore_empty_captions', True):
                         c = None
                         continue
@@ -125,11 +157,11 @@ class TextBasedParser(GenericParser):
 
                 next_line = index + 1
                 if (next_line < len(lines)) and (lines[next_line].isdigit()):
-                    self.captions.append(c)
+                    self.track.append(c[0], c[1], '\n'.join(c[2]))
                     c = None
 
-        if c is not None and c.lines:
-            self.captions.append(c)
+        if c is not None and c[2]:
+            self.track.append(c[0], c[1], '\n'.join(c[2]))
 
 
 class SRTParser(TextBasedParser):
@@ -185,7 +217,9 @@ class WebVTTParser(TextBasedParser):
         self.blocks = list(filter(lambda x: x.lines, blocks))[1:]
 
     def _parse_cue_block(self, block):
-        caption = Caption()
+        """Appends the cue of a cue block to the track."""
+        identifier = None
+        text_lines = []
         cue_timings = None
 
         for line_number, line in enumerate(block.lines):
@@ -200,25 +234,23 @@ class WebVTTParser(TextBasedParser):
                     raise MalformedCaptionError(
                         '--> found in line {}'.format(block.line_number + line_number))
             elif line_number == 0:
-                caption.identifier = line
+                identifier = line
             else:
-                caption.add_line(line)
+                text_lines.append(line)
 
-        caption.start = cue_timings[0]
-        caption.end = cue_timings[1]
-        return caption
+        self.track.append(parse_timestamp(cue_timings[0]), parse_timestamp(cue_timings[1]), '\n'.join(text_lines),
+                          identifier)
 
     def _parse(self, lines):
         self._compute_blocks(lines)
 
         for block in self.blocks:
             if self._is_cue_block(block):
-                caption = self._parse_cue_block(block)
-                self.captions.append(caption)
+                self._parse_cue_block(block)
             elif self._is_comment_block(block):
                 continue
             elif self._is_style_block(block):
-                if self.captions:
+                if len(self.track):
                     raise MalformedFileError(
                         'Style block defined after the first cue in line {}.'
                         .format(block.line_number))
@@ -269,42 +301,69 @@ class SBVParser(TextBasedParser):
         return self._validate_timeframe_line(line)
 
 
-def _tplit(s, tag):
-    delimiter = '<' + tag
-    try:
-        return [(delimiter + item).strip() for item in re.split(delimiter, s, flags=re.I)][1:]
-    except:
-        return []
-
-
-def _lookup(s, pattern):
-    return re.search(pattern, s, flags=re.I)
+SAMI_TAG_PATTERN = re.compile('<(?:(sync)|p)', re.I)
+SAMI_SYNC_START_PATTERN = re.compile('<sync start=([0-9]+)', re.I)
+SAMI_P_CLASS_PATTERN = re.compile('<p(.+)class=([a-z]+)', re.I)
+SAMI_P_OPEN_PATTERN = re.compile('<p([^>]*)>', re.I)
+SAMI_BR_PATTERN = re.compile('<br ?/?>', re.I)
+SAMI_NBSP_PATTERN = re.compile('&nbsp(.)')
+SAMI_DEFAULT_CLASS = 'KRCC'
 
 
 def _normalize(content):
     content = content.replace('\n', ' ')
-    content = re.sub('<br ?/?>', '\n', content, flags=re.I)
-    content = re.sub('<.*?>', '', content)
-    content = re.sub('&nbsp(.)', '', content)
-    content = content.strip()
-    return content
+    if '<' in content:
+        content = SAMI_BR_PATTERN.sub('\n', content)
+        content = Caption.CUE_TEXT_TAGS.sub('', content)
+    if '&nbsp' in content:
+        content = SAMI_NBSP_PATTERN.sub('', content)
+    return content.strip()
 
 
-def _plang(item):
-    try:
-        match = _lookup(item, '<p(.+)class=([a-z]+)')
-        if match:
-            lang = match.group(2)
-        else:
-            lang = 'KRCC'
-    except AttributeError:
-        raise AttributeError('AttributeError - {}'.format(item))
-    try:
-        content = item[_lookup(item, '<p([^>]*)>').end():]
-        content = _normalize(content)
-    except AttributeError:
-        content = ''
-    return [lang, content]
+def _sami_block(text, start, end, paragraphs):
+    """
+    Returns (start_ms, class, text) for the SYNC block text[start:end].
+    paragraphs holds the positions of the P tags inside the block. The class of the first P block is used,
+    together with the text of the last P block of that class. Without P blocks the whole block is the text
+    and class is None.
+    """
+    block = text[start:end].strip()
+    sync = SAMI_SYNC_START_PATTERN.match(block)
+    if not sync:
+        raise MalformedCaptionError('Invalid SYNC tag: {}'.format(block[:50]))
+
+    lang, content = None, None
+    for p_start, p_end in zip(paragraphs, paragraphs[1:] + [end]):
+        paragraph = text[p_start:p_end].strip()
+        match = SAMI_P_CLASS_PATTERN.match(paragraph)
+        p_lang = match.group(2) if match else SAMI_DEFAULT_CLASS
+        if lang is None:
+            lang = p_lang
+        if p_lang == lang:
+            content = paragraph
+    if content is None:
+        return int(sync.group(1)), None, _normalize(block)
+    match = SAMI_P_OPEN_PATTERN.match(content)
+    return int(sync.group(1)), lang, _normalize(content[match.end():]) if match else ''
+
+
+def _scan_sami(text):
+    """
+    Scans a SAMI document once from start to end and yields (start_ms, class, text) for every SYNC block.
+    Anything before the first SYNC tag (the header) is skipped.
+    """
+    sync = None
+    paragraphs = []
+    for tag in SAMI_TAG_PATTERN.finditer(text):
+        if tag.group(1):
+            if sync is not None:
+                yield _sami_block(text, sync, tag.start(), paragraphs)
+            sync = tag.start()
+            paragraphs = []
+        elif sync is not None:
+            paragraphs.append(tag.start())
+    if sync is not None:
+        yield _sami_block(text, sync, len(text), paragraphs)
 
 
 class SMIParser(TextBasedParser):
@@ -323,8 +382,14 @@ class SMIParser(TextBasedParser):
         super().__init__()
         self.styles = []
 
-    def _validate(self, lines):
-        if len(lines) < 2 or (lines[0].lower() != '<sami>' and not lines[0].startswith('<!--')):
+    def _decode_content(self, raw):
+        # the tokenizer scans the whole document, so it is not split into lines
+        return _normalize_newlines(_decode(raw))
+
+    def _validate(self, text):
+        first_line = text.partition('\n')[0]
+        if text.find('\n', 0, len(text) - 1) < 0 or (first_line.lower() != '<sami>' and
+                                                       not first_line.startswith('<!--')):
             raise MalformedFileError('The file does not have a valid format.')
 
     def _is_timeframe_line(self, line):
@@ -333,20 +398,10 @@ class SMIParser(TextBasedParser):
     def _should_skip_line(self, line, index, caption):
         return caption is None and line.isdigit()
 
-    def _parse(self, lines):
-        raw_text = '\n'.join(lines)
-        prev_cap = ''
-        timecode = ''
-        for index, item in enumerate(_tplit(raw_text, 'sync')):
-            start_time = timecode
-            timecode = Caption().to_timestamp(int(_lookup(item, '<sync start=([0-9]+)').group(1)) / 1000)
-            content = dict(map(_plang, _tplit(item, 'p')))
-            if len(content.keys()) > 0:
-                lang = list(content.keys())[0]
-                content = content[lang]
-            else:
-                content = _normalize(item)
-            if prev_cap:
-                caption = Caption(start=start_time, end=timecode, text=prev_cap)
-                self.captions.append(caption)
-            prev_cap = content
+    def _parse(self, text):
+        # a cue lasts until the next SYNC block, the last block only closes the previous cue
+        prev_start, prev_text = None, ''
+        for start, _, content in _scan_sami(text):
+            if prev_text:
+                self.track.append(prev_start, start, '\n'.join(prev_text.splitlines()))
+            prev_start, prev_text = start, content
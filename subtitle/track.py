@@ -0,0 +1,156 @@
+import re
+from array import array
+
+from subtitle.exceptions import MalformedCaptionError
+from subtitle.generic import Caption, Style, TIMESTAMP_PATTERN
+
+EMPTY_TEXTS = ('', '&nbsp;')
+
+
+def parse_timestamp(timestamp):
+    """Converts a 'hh:mm:ss.mmm' timestamp into integer milliseconds."""
+    res = re.match(TIMESTAMP_PATTERN, timestamp)
+    if not res:
+        raise MalformedCaptionError('Invalid timestamp: {}'.format(timestamp))
+    hours, minutes, seconds, milliseconds = (int(x) if x else 0 for x in res.groups())
+    return ((hours * 60 + minutes) * 60 + seconds) * 1000 + milliseconds
+
+
+def to_milliseconds(value):
+    """Accepts integer milliseconds or a timestamp string."""
+    if isinstance(value, int):
+        return value
+    return parse_timestamp(value)
+
+
+def make_caption(start, end, text, identifier=None):
+    """Builds a Caption from integer milliseconds without parsing timestamp strings."""
+    # skip Caption.__init__, which parses default timestamps that would be overwritten anyway
+    caption = Caption.__new__(Caption)
+    caption._start = start / 1000
+    caption._end = end / 1000
+    caption.identifier = identifier
+    caption._lines = text.splitlines()
+    return caption
+
+
+WRITE_CHUNK = 4096  # cues formatted into one buffer before it is written
+
+
+def _format_times(times, separator):
+    """Formats integer milliseconds as 'hh:mm:ss<separator>mmm' timestamps."""
+    suffix = '%02d' + separator + '%03d'
+    prefixes = {}  # 'hh:mm:' by minute, consecutive cues mostly share it
+    formatted = []
+    for ms in times:
+        minutes, ms = divmod(ms, 60000)
+        prefix = prefixes.get(minutes)
+        if prefix is None:
+            prefix = prefixes[minutes] = '%02d:%02d:' % divmod(minutes, 60)
+        formatted.append(prefix + suffix % divmod(ms, 1000))
+    return formatted
+
+
+class CaptionTrack(object):
+    """
+    Compact column-wise storage of captions.
+    Start and end times are kept as integer milliseconds in arrays and the cue texts in a separate list,
+    so time operations and writers work on whole columns instead of Caption objects.
+    """
+
+    def __init__(self, starts=(), ends=(), texts=(), identifiers=None):
+        self.starts = array('q', starts)
+        self.ends = array('q', ends)
+        self.texts = list(texts)
+        self.identifiers = list(identifiers) if identifiers is not None else [None] * len(self.texts)
+        if not len(self.starts) == len(self.ends) == len(self.texts) == len(self.identifiers):
+            raise ValueError('starts, ends and texts must have the same length.')
+
+    @classmethod
+    def from_captions(cls, captions):
+        track = cls()
+        for caption in captions:
+            track.append(round(caption.start_in_seconds * 1000), round(caption.end_in_seconds * 1000),
+                         caption.raw_text, caption.identifier)
+        return track
+
+    def __len__(self):
+        return len(self.texts)
+
+    def caption(self, index):
+        """Returns the cue at index as a Caption."""
+        return make_caption(self.starts[index], self.ends[index], self.texts[index], self.identifiers[index])
+
+    def to_captions(self):
+        return [self.caption(i) for i in range(len(self))]
+
+    def append(self, start, end, text, identifier=None):
+        """Adds a cue. start and end are integer milliseconds, text may span several lines."""
+        self.starts.append(start)
+        self.ends.append(end)
+        self.texts.append(text)
+        self.identifiers.append(identifier)
+
+    def shift(self, milliseconds):
+        """Moves every cue by milliseconds (negative values move cues earlier, never before 0)."""
+        self.starts = array('q', [max(t + milliseconds, 0) for t in self.starts])
+        self.ends = array('q', [max(t + milliseconds, 0) for t in self.ends])
+        return self
+
+    def scale(self, factor):
+        """
+        Multiplies every time by factor.
+        To convert captions timed for source_fps video to target_fps use scale(source_fps / target_fps).
+        """
+        self.starts = array('q', [round(t * factor) for t in self.starts])
+        self.ends = array('q', [round(t * factor) for t in self.ends])
+        return self
+
+    def filter_empty(self):
+        """Returns a new track without cues whose text is blank or '&nbsp;'."""
+        keep = [i for i, text in enumerate(self.texts) if text.strip() not in EMPTY_TEXTS]
+        return CaptionTrack([self.starts[i] for i in keep], [self.ends[i] for i in keep],
+                            [self.texts[i] for i in keep], [self.identifiers[i] for i in keep])
+
+    def write_srt(self, f):
+        starts = _format_times(self.starts, ',')
+        ends = _format_times(self.ends, ',')
+        parts = []
+        for number, (start, end, text) in enumerate(zip(starts, ends, self.texts), start=1):
+            parts.append('%d\n%s --> %s\n%s\n' % (number, start, end, text + '\n' if text else ''))
+            if len(parts) >= WRITE_CHUNK:
+                f.write(''.join(parts))
+                parts.clear()
+        f.write(''.join(parts))
+
+    def write_vtt(self, f):
+        starts = _format_times(self.starts, '.')
+        ends = _format_times(self.ends, '.')
+        parts = ['WEBVTT\n']
+        for start, end, text in zip(starts, ends, self.texts):
+            parts.append('\n%s --> %s\n%s' % (start, end, text + '\n' if text else ''))
+            if len(parts) >= WRITE_CHUNK:
+                f.write(''.join(parts))
+                parts.clear()
+        f.write(''.join(parts))
+
+    def write_smi(self, f, title=None, style=None):
+        parts = ['<SAMI>\n', '\t<HEAD>\n']
+        if title:
+            parts.append('\t\t<TLTLE>{}</TITLE>\n'.format(title))
+        if type(style) == Style:
+            parts.extend(style.lines)
+        parts.append('\t</HEAD>\n')
+        parts.append('\t<BODY>\n')
+        for start, end, text in zip(self.starts, self.ends, self.texts):
+            if text.startswith('<P class=KRCC>'):
+                parts.append('\t\t<SYNC Start={}>{}\n\t\t<SYNC Start={}>&nbsp;\n'.format(start, text, end))
+            else:
+                parts.append('\t\t<SYNC Start={}> <P class=KRCC>{}\n\t\t<SYNC Start={}> <P class=KRCC>&nbsp;\n'
+                             .format(start, text, end))
+            if len(parts) >= WRITE_CHUNK:
+                f.write(''.join(parts))
+                parts.clear()
+        parts.append('\t</BODY>\n')
+        parts.append('</SAMI>\n')
+        f.write(''.join(parts))
@@ -1,9 +1,9 @@
 import os
 
-from subtitle.writers import WebVTTWriter, SRTWriter, SMIWriter, SBVWriter
 from subtitle.exceptions import MalformedFileError, MissingFilenameError
-from subtitle.parsers import WebVTTParser, SRTParser, SBVParser, SMIParser
-from subtitle.generic import Caption, Style
+from subtitle.parsers import WebVTTParser, SRTParser, SBVParser, SMIParser, _decode
+from subtitle.generic import Style
+from subtitle.track import CaptionTrack, to_milliseconds
 
 
 def extract_file_extension(file):
@@ -28,32 +28,34 @@ class Subtitle(object):
 
     def __init__(self, styles=None):
         self.file = None
-        self._captions = []
+        self._track = CaptionTrack()
         self._styles = styles
 
     def __len__(self):
-        return len(self._captions)
+        return len(self._track)
 
     def __getitem__(self, index):
-        return self._captions[index]
+        if isinstance(index, slice):
+            return [self._track.caption(i) for i in range(*index.indices(len(self._track)))]
+        return self._track.caption(index)
 
     def from_srt(self, file):
         """Reads captions from a file in SubRip format."""
         self.file = file
-        self._captions = SRTParser().read(file).captions
+        self._track = SRTParser().read(file).track
         return self
 
     def from_sbv(self, file):
         """Reads captions from a file in YouTube SBV format."""
         self.file = file
-        self._captions = SBVParser().read(file).captions
+        self._track = SBVParser().read(file).track
         return self
 
     def from_vtt(self, file):
         """Reads a WebVTT captions file."""
         parser = WebVTTParser().read(file)
         self.file = file
-        self._captions = parser.captions
+        self._track = parser.track
         self._styles = parser.styles
         return self
 
@@ -61,10 +63,30 @@ class Subtitle(object):
         """Reads a SAMI captions file."""
         parser = SMIParser().read(file)
         self.file = file
-        self._captions = parser.captions
+        self._track = parser.track
         self._styles = parser.styles
         return self
 
+    @staticmethod
+    def decode_bytes(raw):
+        """
+        Decodes the bytes of a captions file to text the way from_bytes does:
+        the BOM decides the encoding if there is one, otherwise the encoding is sniffed.
+        """
+        return _decode(raw)
+
+    def from_bytes(self, raw, format):
+        """Reads captions from the bytes of a captions file in the given format (vtt, srt, sbv or smi)."""
+        parsers = {'vtt': WebVTTParser, 'srt': SRTParser, 'sbv': SBVParser, 'smi': SMIParser}
+        if format not in parsers:
+            raise MalformedFileError('Unknown format: {}'.format(format))
+        parser = parsers[format]().read_bytes(raw)
+        self.file = None
+        self._track = parser.track
+        if format in ('vtt', 'smi'):
+            self._styles = parser.styles
+        return self
+
     def read(self, file):
         ext = extract_file_extension(file)
         if ext == '.srt':
@@ -100,12 +122,10 @@ class Subtitle(object):
                 return target
 
     def add(self, start, end, text, identifier=None):
-        caption = Caption()
-        caption.start = start
-        caption.end = end
-        caption.text = text
-        caption.identifier = identifier
-        self._captions.append(caption)
+        """Adds a caption. start and end are timestamps or integer milliseconds."""
+        if not isinstance(text, str):
+            raise AttributeError('String value expected but received {}.'.format(type(text)))
+        self._track.append(to_milliseconds(start), to_milliseconds(end), '\n'.join(text.splitlines()), identifier)
 
     def save(self, output=''):
         """Save the document.
@@ -137,13 +157,11 @@ class Subtitle(object):
 
     def write(self, f, format='vtt'):
         if format == 'vtt':
-            WebVTTWriter().write(self._captions, f)
+            self._track.write_vtt(f)
         elif format == 'srt':
-            SRTWriter().write(self._captions, f)
+            self._track.write_srt(f)
         elif format == 'smi':
-            SMIWriter(style=self.styles).write(self._captions, f)
-        # elif format == 'sbv':
-        #     SBVWriter().write(self._captions, f)
+            self._track.write_smi(f, style=self.styles)
 
     @staticmethod
     def supported_formats():
@@ -152,15 +170,24 @@ class Subtitle(object):
 
     @property
     def captions(self):
-        """Returns the list of captions."""
-        return self._captions
+        """
+        Returns the list of captions.
+        The captions are built from the track on every call, so changing them does not change the subtitle.
+        Use add() or the CaptionTrack returned by track to modify captions.
+        """
+        return self._track.to_captions()
+
+    @property
+    def track(self):
+        """Returns the captions as a CaptionTrack."""
+        return self._track
 
     @property
     def total_length(self):
         """Returns the total length of the captions."""
-        if not self._captions:
+        if not self._track:
             return 0
-        return int(self._captions[-1].end_in_seconds) - int(self._captions[0].start_in_seconds)
+        return self._track.ends[-1] // 1000 - self._track.starts[0] // 1000
 
     @property
     def styles(self):
@@ -1,8 +1,23 @@
 from subtitle.video_caption import Subtitle
-from subtitle.generic import Style
+from subtitle.generic import Style, Caption
+import io
 import os
+import re
 from pathlib import Path
 
+CUE_TEXT_TAGS = Caption.CUE_TEXT_TAGS
+
+MERGE_MAX_GAP = 1000  # 앞 자막이 끝나고 다음 자막이 시작할 때까지 이보다 오래 걸리면(밀리초) 합치지 않음
+MERGE_MAX_CUES = 4  # 한 번역 단위로 합칠 최대 자막 수
+MERGE_MAX_CHARS = 200  # 한 번역 단위의 최대 글자 수
+SENTENCE_END = ('.', '?', '!', '。', '？', '！')
+CONTINUED = ('...', '…', ',')  # 문장이 다음 자막으로 이어지는 끝
+CLOSING_CHARS = ' "\'»」』)]'
+SPLIT_PUNCT = re.compile(r'[,.?!…，。？！]+["\'」』)\]]*\s+')
+SPLIT_SPACE = re.compile(r'\s+')
+SRT_START = re.compile(r'\d+\s*\n\s*\d+:\d{2}:\d{2}[,.]\d{3}\s*-->')
+SBV_START = re.compile(r'\d+:\d{2}:\d{2}\.\d{3},\d+:\d{2}:\d{2}\.\d{3}')
+
 
 def file_ext(file):
     return Path(file).suffix
@@ -38,23 +53,185 @@ def subtitle_captions(file):
         captions = Subtitle().from_smi(file)
     else:
         raise Exception('Unknown subtitle format - {}'.format(ext))
+    return _texts_and_times(captions)
 
-    times = []
-    texts = []
-    for caption in captions:
-        times.append([caption.start, caption.end])
-        texts.append(caption.text)
+
+def subtitle_captions_from_bytes(raw, fmt):
+    """subtitle_captions와 같지만 파일 대신 fmt(srt, vtt, smi, sbv) 형식의 자막 파일 내용(bytes)을 읽습니다."""
+    return _texts_and_times(Subtitle().from_bytes(raw, fmt))
+
+
+def subtitle_format(raw):
+    """자막 파일 내용의 앞부분으로 형식(srt, vtt, smi, sbv)을 추정합니다. 알 수 없으면 None을 반환합니다."""
+    # 자막 파일을 읽을 때와 같은 방식으로 디코딩 (BOM으로 UTF-16 등 인코딩 판별)
+    head = Subtitle.decode_bytes(raw[:4096]).lstrip('\ufeff \t\r\n').replace('\r', '\n')
+    lower = head.lower()
+    if head.startswith('WEBVTT'):
+        return 'vtt'
+    if lower.startswith('<sami') or (lower.startswith('<!--') and '<sami' in lower):
+        return 'smi'
+    if SRT_START.match(head):
+        return 'srt'
+    if SBV_START.match(head):
+        return 'sbv'
+    return None
+
+
+def _texts_and_times(captions):
+    # 시간은 밀리초 정수로 반환
+    track = captions.track
+    times = [[start, end] for start, end in zip(track.starts, track.ends)]
+    texts = [CUE_TEXT_TAGS.sub('', text) for text in track.texts]
 
     return texts, times
 
 
+def _is_isolated_cue(text):
+    """대사 구분(-)이나 음악 기호(♪)가 있는 자막은 다른 자막과 합치지 않음"""
+    return text.startswith('-') or '\n-' in text or '♪' in text
+
+
+def _ends_sentence(text):
+    text = text.rstrip(CLOSING_CHARS)
+    return text.endswith(SENTENCE_END) and not text.endswith(CONTINUED)
+
+
+def merge_cues(texts, times, max_gap=MERGE_MAX_GAP, max_cues=MERGE_MAX_CUES, max_chars=MERGE_MAX_CHARS):
+    """
+    한 문장이 여러 자막에 나뉘어 있으면 이어지는 자막을 합쳐 번역 단위를 만듭니다.
+    문장 끝 문장부호, 자막 사이의 시간 간격, 대사 구분(-)을 기준으로 나누며
+    (번역할 텍스트, 자막 인덱스 리스트)의 리스트를 반환합니다. 빈 자막은 번역하지 않으므로 포함하지 않습니다.
+
+    Args:
+        texts (list): 자막 텍스트
+        times (list): 자막별 [시작, 끝] 밀리초
+        max_gap (int): 합칠 수 있는 자막 사이의 최대 간격(밀리초)
+        max_cues (int): 한 번역 단위로 합칠 최대 자막 수
+        max_chars (int): 한 번역 단위의 최대 글자 수
+    """
+    units = []
+    group, merged = [], ''
+
+    def flush():
+        nonlocal group, merged
+        if group:
+            units.append((merged, group))
+        group, merged = [], ''
+
+    for i, text in enumerate(texts):
+        text = ' '.join(text.split())
+        if not text or text == '&nbsp;':
+            continue
+        if _is_isolated_cue(texts[i]):
+            flush()
+            units.append((texts[i], [i]))
+            continue
+        if group and (times[i][0] - times[group[-1]][1] > max_gap or len(group) >= max_cues or
+                      len(merged) + 1 + len(text) > max_chars):
+            flush()
+        group.append(i)
+        merged = merged + ' ' + text if merged else text
+        if _ends_sentence(text):
+            flush()
+    flush()
+    return units
+
+
+def _nearest(positions, target, low, high):
+    """low < 위치 < high 범위에서 target에 가장 가까운 위치, 없으면 None"""
+    candidates = [pos for pos in positions if low < pos < high]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda pos: abs(pos - target))
+
+
+def split_translation(text, weights):
+    """
+    합쳐서 번역한 텍스트를 weights(원문 자막 길이) 비율로 len(weights)개로 나눕니다.
+    나누는 위치 근처에 문장부호가 있으면 문장부호 뒤에서, 없으면 가장 가까운 공백에서 나눕니다.
+    """
+    text = text.strip()
+    if len(weights) == 1:
+        return [text]
+    total = sum(weights) or len(weights)
+    window = len(text) / len(weights) / 2  # 문장부호를 찾는 범위
+    punct = [m.end() for m in SPLIT_PUNCT.finditer(text)]
+    spaces = [m.end() for m in SPLIT_SPACE.finditer(text)]
+
+    parts = []
+    begin = 0
+    acc = 0
+    for weight in weights[:-1]:
+        acc += weight
+        target = len(text) * acc / total
+        pos = _nearest(punct, target, max(begin, target - window), min(len(text), target + window))
+        if pos is None:
+            pos = _nearest(spaces, target, begin, len(text))
+        if pos is None:
+            pos = max(begin, min(round(target), len(text)))
+        parts.append(text[begin:pos].strip())
+        begin = pos
+    parts.append(text[begin:].strip())
+    return parts
+
+
+def subtitle_units(sources, times, merge=False):
+    """자막 텍스트를 (번역할 텍스트, 자막 인덱스 리스트)의 번역 단위로 묶습니다. merge가 False면 자막 하나가 한 단위입니다."""
+    if merge:
+        return merge_cues(sources, times)
+    return [(source, [i]) for i, source in enumerate(sources)]
+
+
+def distribute_translations(sources, units, unit_targets):
+    """번역 단위별 번역 결과를 자막별 번역 결과로 나눕니다. 번역 단위에 속하지 않은 자막은 원문을 그대로 둡니다."""
+    targets = list(sources)
+    for (_, cues), target in zip(units, unit_targets):
+        for i, part in zip(cues, split_translation(target, [len(sources[i]) for i in cues])):
+            targets[i] = part
+    return targets
+
+
+def translated_filename(filename, tl, output_dir=None):
+    """
+    번역한 자막을 저장할 경로. 파일 이름에 '_<tl>'을 붙이며, srt와 vtt는 같은 형식으로, 나머지는 smi로 저장합니다.
+    output_dir를 지정하면 그 디렉토리에, 아니면 원본과 같은 디렉토리에 저장합니다.
+    """
+    ext = file_ext(filename)
+    out_ext = ext if ext in ('.srt', '.vtt') else '.smi'
+    path = Path(filename)
+    if output_dir is not None:
+        path = Path(output_dir) / path.name
+    return str(path.with_name(path.stem + '_' + tl + out_ext))
+
+
+def save_translation(output, sources, targets, times):
+    """번역한 자막을 output의 확장자에 맞는 형식으로 저장하고 저장한 파일 경로를 반환합니다."""
+    ext = file_ext(output)
+    if ext == '.srt':
+        return save_to_srt(output, targets, times)
+    if ext == '.vtt':
+        return save_to_vtt(output, targets, times)
+    return save_to_smi(output, times, sources, targets, 'False')
+
+
+def format_translation(fmt, sources, targets, times):
+    """번역한 자막을 fmt(srt, vtt, smi) 형식의 문자열로 만듭니다. 파일로 저장하는 save_to_* 함수와 같은 내용입니다."""
+    if fmt == 'smi':
+        subtitle = _smi_subtitle(times, sources, targets)
+    else:
+        subtitle = _text_subtitle(targets, times)
+    buffer = io.StringIO()
+    subtitle.write(buffer, format=fmt)
+    return buffer.getvalue()
+
+
 def _normalize(content):
     content = content.replace('\n', ' ')
     content = content.strip()
     return content
 
 
-def save_to_smi(file, times, source, target, both='False', extension='smi'):
+def _smi_subtitle(times, source, target, both='False'):
     smi_style = """
     <STYLE TYPE="text/css">
     <!--
@@ -75,18 +252,26 @@ def save_to_smi(file, times, source, target, both='False', extension='smi'):
             subtitle.add(time[0], time[1], '<P class=KRCC>{}</P><BR><P class=ENCC>{}'.format(tgt, _normalize(src)))
         else:
             subtitle.add(time[0], time[1], tgt)
-    return subtitle.save_as_smi(file, extension)
+    return subtitle
 
 
-def save_to_srt(filename, texts, times):
+def save_to_smi(file, times, source, target, both='False', extension='smi'):
+    return _smi_subtitle(times, source, target, both).save_as_smi(file, extension)
+
+
+def _text_subtitle(texts, times):
+    """srt, vtt로 저장할 자막. 빈 자막은 넣지 않습니다."""
     subtitle = Subtitle()
     for time, text in zip(times, texts):
         if (text == "&nbsp;") or (not text.strip()):
             continue
         text = text.replace('<br>', '\n')
         subtitle.add(time[0], time[1], text)
+    return subtitle
 
-    return subtitle.save_as_srt(filename)
+
+def save_to_srt(filename, texts, times):
+    return _text_subtitle(texts, times).save_as_srt(filename)
 
 
 def save_as_srt(filename, captions):
@@ -94,17 +279,10 @@ def save_as_srt(filename, captions):
     for caption in captions:
         if caption.text == "&nbsp;":
             continue
-        subtitle.add(caption.start, caption.end, caption.text)
+        subtitle.add(round(caption.start_in_seconds * 1000), round(caption.end_in_seconds * 1000), caption.text)
 
     return subtitle.save_as_srt(filename)
 
 
 def save_to_vtt(filename, texts, times):
-    subtitle = Subtitle()
-    for time, text in zip(times, texts):
-        if (text == "&nbsp;") or (not text.strip()):
-            continue
-        text = text.replace('<br>', '\n')
-        subtitle.add(time[0], time[1], text)
-
-    return subtitle.save_as_vtt(filename)
+    return _text_subtitle(texts, times).save_as_vtt(filename)
@@ -1,125 +1,199 @@
 """ 텍스트를 문장 단위로 분리하는 파서 """
 
+import re
+
 BOUNDRY_CHARS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ \n"'
+ABBREVIATIONS = ["Mr.", "Ms.", "Mrs.", "Dr.", "Prof.", "Ph.", "etc.", "e.g.", "i.e.", "a.m.", "p.m.",
+                 "vs.", "No.", "St.", "Ave.", "Dept.", "Inc.", "Ltd.", "Gov."]
+
+_CANDIDATE = re.compile(r'[?!."\n]')  # 문장 경계 여부를 검사해야 하는 문자
+_UPPER_RUN = re.compile(r'[A-Z.]*')
 
 
 class SentenceParser:
+    """
+    텍스트를 문장 단위로 분리합니다.
+    문장 경계 후보 문자만 정규식으로 찾아 검사하고, 약어는 길이별 집합에서 찾으므로 텍스트 길이에 비례하는 시간에 처리합니다.
+    """
+
     def __init__(self):
-        self.i = 0
-        self.text = None
-        self.abbreviations = ["Mr.", "Ms.", "Mrs.", "Dr.", "Prof.", "Ph.", "etc.", "e.g.", "i.e.", "a.m.", "p.m.",
-                              "vs.", "No.", "St.", "Ave.", "Dept.", "Inc.", "Ltd.", "Gov."]
+        self.abbreviations = list(ABBREVIATIONS)
         self.max_len = 255
         self.sentences = []
+        self._abbr_table = []
 
-    def _next_char_(self, inc=1):
-        if self.i + inc <= len(self.text) - 1:
-            return self.text[self.i + inc]
-        else:
-            return None
-
-    def _skip_(self):
-        if self.i < len(self.text) - 1:
-            self.i += 1
-        else:
-            raise IndexError
-
-    def _is_abbr_(self, word):
-        is_abbreviation = False
+    def _build_abbr_table(self):
+        table = {}
         for abbr in self.abbreviations:
-            if word.endswith(abbr):
-                is_abbreviation = True
-                continue
-        return is_abbreviation
+            table.setdefault(len(abbr), set()).add(abbr)
+        self._abbr_table = sorted(table.items())
+
+    def _is_abbr_(self, text, start, end):
+        """text[start:end] 문장이 등록된 약어로 끝나는지 확인합니다."""
+        for length, abbrs in self._abbr_table:
+            if end - length < start:
+                break
+            if text[end - length:end] in abbrs:
+                return True
+        return False
 
     def _append_(self, sent):
         sent = sent.replace('\n', ' ').strip()
         self.sentences.append(sent)
 
     def parse(self, text):
-        self.text = text
         self.sentences = []
+        self._build_abbr_table()
+        i_prev = self._segment(text, 0, 0, final=True)[1]
+        if len(text) > i_prev:
+            self._append_(text[i_prev:])
+        return self.sentences
+
+    def _segment(self, text, i, i_prev, final):
+        """
+        text[i:]에서 문장 경계를 찾아 self.sentences에 추가하고 (다음에 검사할 위치, 마지막 문장의 끝 위치)를 반환합니다.
+        final이 False이면 text 뒤에 이어질 문자를 알아야 판단할 수 있는 위치에서 멈춥니다.
+        """
         text_len = len(text)
-        self.i = 0
-        i_prev = 0
-        while self.i < text_len:
-            char = text[self.i]
-            if char in ['?', '!']:
-                sent = str(text[i_prev: self.i + 1])
-                self.sentences.append(sent)
-                i_prev = self.i + 1
+        while True:
+            match = _CANDIDATE.search(text, i)
+            if match is None:
+                return max(i, text_len), i_prev
+            i = match.start()
+            char = text[i]
+            if char == '?' or char == '!':
+                self.sentences.append(text[i_prev: i + 1])
+                i_prev = i + 1
             elif char == '.':
-                if self.i < text_len - 1:
-                    next_c = self._next_char_()
+                if i == text_len - 1:
+                    if not final:
+                        return i, i_prev
+                    self._append_(text[i_prev:])
+                    i_prev = text_len
+                else:
+                    next_c = text[i + 1]
                     if next_c not in BOUNDRY_CHARS:  # . 문자 뒤에 문장 경계 후보에 해당하지 않는 문자가 오는 경우
-                        self.i += 1
-                        continue
-                    else:
-                        if next_c == ' ':
-                            # self._skip_()
-                            if self._next_char_(2) in BOUNDRY_CHARS:  # . 문자 뒤 공백이 오고 그 다음에 문장경계 후보 문자가 오는 경우
-                                sent = str(text[i_prev: self.i + 1])
-                                if self._is_abbr_(sent):
-                                    self.i += 1
-                                else:
-                                    self._append_(sent)
-                                    i_prev = self.i + 1
-                        elif next_c.isupper():
-                            if text[self.i - 1].islower():
-                                sent = str(text[i_prev: self.i + 1])
-                                if not self._is_abbr_(sent):
-                                    self._append_(sent)
-                                    i_prev = self.i + 1
+                        pass
+                    elif next_c == ' ':
+                        if i + 2 == text_len:  # 텍스트가 '. '로 끝나는 경우
+                            if not final:
+                                return i, i_prev
+                            if self._is_abbr_(text, i_prev, i + 1):
+                                i += 1
+                            else:
+                                self._append_(text[i_prev: i + 1])
+                                i_prev = text_len
+                        elif text[i + 2] in BOUNDRY_CHARS:  # . 문자 뒤 공백이 오고 그 다음에 문장경계 후보 문자가 오는 경우
+                            if self._is_abbr_(text, i_prev, i + 1):
+                                i += 1
                             else:
-                                w_i = self.i - 1
-                                # U.S.A.와 같은 등록되지 않은 약어인지 확인하기 위해 대문자와 . 문자를 스킵
-                                while (self.i < text_len - 1) and (self._next_char_() in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ.'):
-                                    self._skip_()
-                                word = str(text[w_i: self.i + 1])
-                                sent = str(text[i_prev: self.i + 1])
-                                # word가 U.S.A와 같은 약어이거나 문장이 등록된 약어로 끝나는 경우
-                                if word.isupper() or self._is_abbr_(sent):
-                                    self.i += 1
-                                else:
-                                    self._append_(sent)
-                                    i_prev = self.i + 1
+                                self._append_(text[i_prev: i + 1])
+                                i_prev = i + 1
+                    elif next_c.isupper():
+                        # 텍스트가 . 문자로 시작하면 이전 문자는 소문자가 아닌 것으로 봄
+                        if i > 0 and text[i - 1].islower():
+                            if not self._is_abbr_(text, i_prev, i + 1):
+                                self._append_(text[i_prev: i + 1])
+                                i_prev = i + 1
                         else:
-                            if next_c == '\n':
-                                self._skip_()
-                            sent = str(text[i_prev: self.i + 1])
-                            if self._is_abbr_(sent):
-                                self.i += 1
+                            w_i = max(i - 1, 0)
+                            # U.S.A.와 같은 등록되지 않은 약어인지 확인하기 위해 대문자와 . 문자를 스킵
+                            run_end = _UPPER_RUN.match(text, i + 1).end()
+                            if run_end == text_len and not final:
+                                return i, i_prev
+                            i = run_end - 1
+                            # word가 U.S.A와 같은 약어이거나 문장이 등록된 약어로 끝나는 경우
+                            if text[w_i: i + 1].isupper() or self._is_abbr_(text, i_prev, i + 1):
+                                i += 1
                             else:
-                                self._append_(sent)
-                                i_prev = self.i + 1
-                else:
-                    sent = str(text[i_prev: self.i + 1])
-                    self._append_(sent)
-                    i_prev = self.i + 1
+                                self._append_(text[i_prev: i + 1])
+                                i_prev = i + 1
+                    else:
+                        if next_c == '\n':
+                            i += 1
+                        if self._is_abbr_(text, i_prev, i + 1):
+                            i += 1
+                        else:
+                            self._append_(text[i_prev: i + 1])
+                            i_prev = i + 1
             elif char == '"':
-                if self.i < len(self.text) - 1:
-                    self._skip_()
-                while (text[self.i] != '"') and (self.i < text_len):
-                    try:
-                        self._skip_()
-                    except IndexError:
-                        break
-            elif char == '\n':
-                if (self.i + 1) < text_len - 1 and self._next_char_().isupper():
-                    sent = str(text[i_prev: self.i + 1])
-                    self._append_(sent)
-                    i_prev = self.i + 1
-                elif self.i - i_prev > self.max_len:
-                    sent = str(text[i_prev: self.i + 1])
-                    self._append_(sent)
-                    i_prev = self.i + 1
-
-            self.i += 1
-
-        if self.i > i_prev:
-            self._append_(str(text[i_prev: self.i + 1]))
+                # 닫는 따옴표까지 건너뜀
+                if i < text_len - 1:
+                    close = text.find('"', i + 1)
+                    if close < 0 and not final:
+                        return i, i_prev
+                    i = close if close >= 0 else text_len - 1
+                elif not final:
+                    return i, i_prev
+            else:  # 줄바꿈
+                if i + 2 >= text_len and not final:
+                    return i, i_prev
+                if i + 2 < text_len and text[i + 1].isupper():
+                    self._append_(text[i_prev: i + 1])
+                    i_prev = i + 1
+                elif i - i_prev > self.max_len:
+                    self._append_(text[i_prev: i + 1])
+                    i_prev = i + 1
+
+            i += 1
+
+
+class StreamingSentenceParser(SentenceParser):
+    """
+    여러 조각으로 나뉘어 들어오는 텍스트를 문장 단위로 분리합니다.
+    feed로 넣은 조각에서 경계가 확정된 문장을 바로 반환하고, 나머지는 다음 조각과 이어서 검사합니다.
+    모든 조각을 넣고 close를 호출할 때까지 반환한 문장은 전체 텍스트를 parse한 결과와 같습니다.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._buffer = ''
+        self._i = 0
+        self._i_prev = 0
+
+    def feed(self, chunk):
+        """텍스트 조각을 추가하고 경계가 확정된 문장 리스트를 반환합니다."""
+        if not self._abbr_table:
+            self._build_abbr_table()
+        self.sentences = []
+        self._buffer += chunk
+        self._i, self._i_prev = self._segment(self._buffer, self._i, self._i_prev, final=False)
+        # 이전 문자를 확인할 수 있도록 마지막 문장의 끝 바로 앞 문자부터 남김
+        keep = max(self._i_prev - 1, 0)
+        if keep:
+            self._buffer = self._buffer[keep:]
+            self._i -= keep
+            self._i_prev -= keep
         return self.sentences
 
+    def close(self):
+        """남은 텍스트의 문장 리스트를 반환합니다."""
+        if not self._abbr_table:
+            self._build_abbr_table()
+        self.sentences = []
+        text = self._buffer
+        i_prev = self._segment(text, self._i, self._i_prev, final=True)[1]
+        if len(text) > i_prev:
+            self._append_(text[i_prev:])
+        self._buffer = ''
+        self._i = 0
+        self._i_prev = 0
+        return self.sentences
 
 
+def split_text_by_words(text):
+    words = text.split()
+    substrings = []
+    current_substring = ""
+
+    for word in words:
+        if len(current_substring) + len(word) + 1 <= 255:
+            current_substring += word + " "
+        else:
+            substrings.append(current_substring.strip())
+            current_substring = word + " "
+
+    if current_substring:
+        substrings.append(current_substring.strip())
 
+    return substrings
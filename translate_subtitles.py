@@ -0,0 +1,189 @@
+""" 디렉토리의 자막 파일들을 서버 없이 한 번에 번역하는 명령행 도구
+
+자막 읽기와 저장은 프로세스 풀에서 실행하고, 모든 파일의 자막은 하나의 BatchScheduler로 모아 모델 배치를 채웁니다.
+파일별 번역이 끝나는 대로 결과 파일을 저장하며, 번역한 파일이 원본보다 새로우면 건너뜁니다.
+
+사용 예
+    uv run translate_subtitles.py -m ./models/BlueT -i ./subtitles -o ./subtitles_ko --tl ko --merge
+"""
+import argparse
+import asyncio
+import copy
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from engine import load_engine, load_tokenizer, PRECISIONS, BACKENDS
+from scheduler import BatchScheduler
+from translation_memory import TranslationMemory
+from subtitle_utils import (subtitle_captions, subtitle_units, distribute_translations, translated_filename,
+                            save_translation)
+
+SUBTITLE_EXTS = ('.srt', '.smi', '.sami', '.vtt', '.sbv')
+MAX_INPUT_LEN = 255  # 한 라인당 최대 토큰 수
+
+
+def find_subtitles(paths):
+    """파일과 디렉토리(하위 디렉토리 포함)에서 자막 파일 경로를 찾습니다."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in sorted(names)
+                             if os.path.splitext(name)[1].lower() in SUBTITLE_EXTS)
+        else:
+            files.append(path)
+    return files
+
+
+def output_path(filename, input_root, output_dir, tl):
+    """output_dir를 지정하면 입력 디렉토리 구조를 유지해 output_dir 아래에 저장합니다."""
+    if output_dir is None:
+        return translated_filename(filename, tl)
+    relative = os.path.relpath(os.path.dirname(filename), input_root) if input_root else '.'
+    return translated_filename(filename, tl, os.path.normpath(os.path.join(output_dir, relative)))
+
+
+def exclude_outputs(files, input_root, output_dir, tl):
+    """
+    이전에 번역해 저장한 파일을 다시 번역하지 않도록, 찾은 파일 중 다른 파일의 번역 결과 경로인 파일과
+    입력 디렉토리 안에 있는 output_dir 아래의 파일을 제외합니다.
+    """
+    outputs = set()
+    for filename in files:
+        # -o 없이 원본 옆에 저장한 이전 번역 결과도 제외
+        outputs.add(os.path.abspath(translated_filename(filename, tl)))
+        outputs.add(os.path.abspath(output_path(filename, input_root, output_dir, tl)))
+    output_root = os.path.join(os.path.abspath(output_dir), '') if output_dir is not None else None
+    sources = []
+    for filename in files:
+        path = os.path.abspath(filename)
+        if path in outputs or (output_root is not None and path.startswith(output_root)):
+            continue
+        sources.append(filename)
+    return sources
+
+
+def is_up_to_date(filename, output):
+    return os.path.exists(output) and os.path.getmtime(output) >= os.path.getmtime(filename)
+
+
+def write_output(output, sources, targets, times):
+    """프로세스 풀에서 실행하는 저장 함수"""
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    return save_translation(output, sources, targets, times)
+
+
+class Summary:
+    def __init__(self):
+        self.files = 0
+        self.skipped = 0
+        self.failed = 0
+        self.cues = 0
+        self.sequences = 0
+
+
+async def translate_file(filename, output, translate_fn, pool, merge, summary):
+    loop = asyncio.get_running_loop()
+    try:
+        sources, times = await loop.run_in_executor(pool, subtitle_captions, filename)
+        units = subtitle_units(sources, times, merge)
+        unit_targets = await translate_fn([text for text, _ in units])
+        targets = distribute_translations(sources, units, unit_targets)
+        await loop.run_in_executor(pool, write_output, output, sources, targets, times)
+    except Exception as e:
+        summary.failed += 1
+        print(f"실패: {filename} - {e}", file=sys.stderr)
+        return
+    summary.files += 1
+    summary.cues += len(sources)
+    summary.sequences += len(units)
+    print(f"{output}: 자막 {len(sources)}개, 번역 단위 {len(units)}개")
+
+
+async def translate_files(args, files):
+    summary = Summary()
+    input_root = args.input[0] if len(args.input) == 1 and os.path.isdir(args.input[0]) else None
+    tasks = []
+    for filename in exclude_outputs(files, input_root, args.output_dir, args.tl):
+        output = output_path(filename, input_root, args.output_dir, args.tl)
+        if not args.force and is_up_to_date(filename, output):
+            summary.skipped += 1
+        else:
+            tasks.append((filename, output))
+    if not tasks:
+        return summary
+
+    # 자식 프로세스가 모델 스레드를 물려받지 않도록 spawn으로 만들고, 모델을 불러오기 전에 시작
+    pool = ProcessPoolExecutor(max_workers=args.procs, mp_context=multiprocessing.get_context('spawn'))
+    tokenizer = load_tokenizer(args.model)
+    length_tokenizer = copy.deepcopy(tokenizer)
+    engine = load_engine(args.model, tokenizer, max_batch=args.batch, max_length=MAX_INPUT_LEN,
+                         precision=args.precision, backend=args.backend)
+
+    def token_lengths(sources):
+        return [len(ids) for ids in length_tokenizer(sources)['input_ids']]
+
+    # 모든 파일의 번역 단위를 하나의 스케줄러로 모아 모델 배치를 채움
+    scheduler = BatchScheduler(engine.translate, max_batch=args.batch, max_wait_ms=args.max_wait_ms,
+                               workers=args.workers, length_fn=token_lengths, sort_by_length=args.sort_by_length)
+    scheduler.start()
+    memory = TranslationMemory(max_size=args.tm_size) if args.tm_size > 0 else None
+    prompt = "K2E: " if args.tl == 'en' else "E2K, NRM: "
+
+    async def translate_fn(sents):
+        if memory is not None:
+            return await memory.translate(prompt, sents, scheduler.submit)
+        return await scheduler.submit([prompt + sent.strip() for sent in sents])
+
+    # 파일을 모두 한꺼번에 읽어 메모리에 올리지 않도록 동시에 처리하는 파일 수를 제한
+    limit = asyncio.Semaphore(args.files_ahead)
+
+    async def run(filename, output):
+        async with limit:
+            await translate_file(filename, output, translate_fn, pool, args.merge, summary)
+
+    try:
+        await asyncio.gather(*(run(filename, output) for filename, output in tasks))
+    finally:
+        await scheduler.stop()
+        pool.shutdown()
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='자막 파일 일괄 번역기')
+    parser.add_argument('-i', '--input', type=str, nargs='+', required=True, help='번역할 자막 파일 또는 디렉토리')
+    parser.add_argument('-o', '--output_dir', type=str, default=None,
+                        help='번역한 자막을 저장할 디렉토리. 지정하지 않으면 원본과 같은 디렉토리에 저장')
+    parser.add_argument('--tl', type=str, default='ko', help='target 언어 (ko, en)')
+    parser.add_argument('-m', '--model', type=str, default='./models/BlueT')
+    parser.add_argument('-b', '--batch', type=int, default=8)
+    parser.add_argument('--backend', type=str, default='torch', choices=BACKENDS)
+    parser.add_argument('--precision', type=str, default='fp32', choices=PRECISIONS)
+    parser.add_argument('-w', '--max_wait_ms', type=float, default=5.0)
+    parser.add_argument('-t', '--workers', type=int, default=1)
+    parser.add_argument('--sort_by_length', action='store_true')
+    parser.add_argument('--tm_size', type=int, default=100000)
+    parser.add_argument('--merge', action='store_true', help='한 문장이 나뉜 자막을 합쳐서 번역')
+    parser.add_argument('--procs', type=int, default=max(1, min(4, os.cpu_count() or 1)),
+                        help='자막 읽기/저장에 사용할 프로세스 수')
+    parser.add_argument('--files_ahead', type=int, default=16, help='동시에 번역하는 최대 파일 수')
+    parser.add_argument('--force', action='store_true', help='번역한 파일이 원본보다 새로워도 다시 번역')
+    args = parser.parse_args()
+
+    files = find_subtitles(args.input)
+    start = time.perf_counter()
+    summary = asyncio.run(translate_files(args, files))
+    elapsed = time.perf_counter() - start
+    print(f"파일 {summary.files}개 번역, {summary.skipped}개 건너뜀, {summary.failed}개 실패 - "
+          f"자막 {summary.cues}개, 번역 단위 {summary.sequences}개, {elapsed:.1f}초 "
+          f"({summary.cues / elapsed if elapsed > 0 else 0:.1f} 자막/초)")
+    if summary.failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
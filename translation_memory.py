@@ -0,0 +1,241 @@
+""" 번역한 문장을 저장해 두었다가 같은 문장이 다시 들어오면 재사용하는 번역 메모리 """
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger('nmt')
+
+DB_CHUNK = 500  # 한 번의 SELECT로 조회할 최대 문장 수 (SQLite 변수 개수 제한)
+PURGE_INTERVAL = 3600  # ttl을 지정했을 때 SQLite에서 만료된 번역 결과를 지우는 간격(초)
+
+
+def normalize(sent):
+    """공백 차이만 있는 문장을 같은 문장으로 보기 위해 연속된 공백을 하나로 줄입니다."""
+    return ' '.join(sent.split())
+
+
+class TranslationMemory:
+    """
+    (프롬프트, 정규화된 문장)을 키로 번역 결과를 보관하는 2단계 캐시입니다.
+    1단계는 프로세스 내 LRU, 2단계는 재시작 후에도 남아 있고 여러 서버 프로세스가 함께 쓸 수 있는 SQLite 파일입니다.
+    translate에서 SQLite 조회와 저장은 이벤트 루프를 막지 않도록 요청마다 한 번에 모아 별도 스레드에서 실행합니다.
+    같은 문장이 동시에 여러 요청에서 들어오면 한 번만 번역합니다.
+
+    Args:
+        max_size (int): LRU에 보관할 최대 문장 수. 0이면 LRU를 사용하지 않음
+        ttl (float): 번역 결과의 유효 시간(초). 0이면 만료되지 않음.
+            SQLite의 만료된 번역 결과는 시작할 때와 저장할 때 PURGE_INTERVAL마다 지움
+        db_path (str, optional): SQLite 파일 경로. 지정하지 않으면 디스크 캐시를 사용하지 않음
+    """
+
+    def __init__(self, max_size=100000, ttl=0, db_path=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()  # SQLite 연결은 한 번에 한 스레드만 사용
+        self._inflight = {}
+        self._db = None
+        self._purged = 0.0
+        if db_path:
+            self._db = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            # WAL에서는 NORMAL로도 DB가 손상되지 않음. 전원이 꺼지면 마지막 커밋 일부만 잃을 수 있음
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.execute('CREATE TABLE IF NOT EXISTS tm ('
+                             'prompt TEXT NOT NULL, source TEXT NOT NULL, target TEXT NOT NULL, '
+                             'created REAL NOT NULL, PRIMARY KEY (prompt, source))')
+            self._db.execute('CREATE INDEX IF NOT EXISTS tm_created ON tm (created)')
+            self._db.commit()
+            if self.ttl > 0:
+                self._purge()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _expired(self, created):
+        return self.ttl > 0 and time.time() - created > self.ttl
+
+    def _remember(self, key, target, created):
+        if self.max_size <= 0:
+            return
+        self._cache[key] = (target, created)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+    def _get_cached(self, key):
+        """LRU에 저장된 번역 결과를 반환하고, 없으면 None을 반환합니다."""
+        with self._lock:
+            item = self._cache.get(key)
+            if item is not None:
+                if not self._expired(item[1]):
+                    self._cache.move_to_end(key)
+                    self.hits += 1
+                    return item[0]
+                del self._cache[key]
+        return None
+
+    def _load(self, prompt, sources):
+        """정규화된 문장 sources를 SQLite에서 DB_CHUNK개씩 한 번에 조회해 {문장: (번역, 저장 시각)}을 반환합니다."""
+        found = {}
+        with self._db_lock:
+            for i in range(0, len(sources), DB_CHUNK):
+                chunk = sources[i:i + DB_CHUNK]
+                rows = self._db.execute('SELECT source, target, created FROM tm WHERE prompt = ? AND source IN '
+                                        f'({", ".join("?" * len(chunk))})', (prompt, *chunk))
+                found.update((source, (target, created)) for source, target, created in rows)
+        return found
+
+    def _store(self, rows):
+        with self._db_lock:
+            self._db.executemany('INSERT OR REPLACE INTO tm (prompt, source, target, created) '
+                                 'VALUES (?, ?, ?, ?)', rows)
+            self._db.commit()
+            if self.ttl > 0 and time.time() - self._purged > PURGE_INTERVAL:
+                self._purge()
+
+    def _purge(self):
+        """SQLite에서 만료된 번역 결과를 지웁니다. 여러 서버 프로세스가 함께 쓰는 파일이 계속 커지지 않도록 함"""
+        self._purged = time.time()
+        self._db.execute('DELETE FROM tm WHERE created < ?', (self._purged - self.ttl,))
+        self._db.commit()
+
+    def _remember_loaded(self, prompt, found):
+        """SQLite에서 찾은 번역 결과 중 만료되지 않은 것을 LRU에 넣고 {문장: 번역}으로 반환합니다."""
+        targets = {}
+        with self._lock:
+            for source, (target, created) in found.items():
+                if not self._expired(created):
+                    self._remember((prompt, source), target, created)
+                    targets[source] = target
+        return targets
+
+    def get(self, prompt, sent):
+        """저장된 번역 결과를 반환하고, 없으면 None을 반환합니다. SQLite를 직접 조회하므로 이벤트 루프에서는 translate를 사용합니다."""
+        key = (prompt, normalize(sent))
+        target = self._get_cached(key)
+        if target is None and self._db is not None:
+            target = self._remember_loaded(prompt, self._load(prompt, [key[1]])).get(key[1])
+            if target is not None:
+                self.disk_hits += 1
+        return target
+
+    def _put_cached(self, prompt, sents, targets):
+        """번역 결과를 LRU에 넣고 SQLite에 저장할 행을 반환합니다."""
+        now = time.time()
+        rows = []
+        with self._lock:
+            for sent, target in zip(sents, targets):
+                key = (prompt, normalize(sent))
+                self._remember(key, target, now)
+                rows.append((key[0], key[1], target, now))
+        return rows
+
+    def put_many(self, prompt, sents, targets):
+        rows = self._put_cached(prompt, sents, targets)
+        if self._db is not None:
+            self._store(rows)
+
+    async def translate(self, prompt, sents, translate_fn):
+        """
+        번역 메모리에 없는 문장만 translate_fn으로 번역하고, 결과를 입력 순서대로 반환합니다.
+
+        Args:
+            prompt (str): 번역 방향 프롬프트
+            sents (list): 번역할 문장 리스트
+            translate_fn (callable): 프롬프트가 붙은 문장 리스트를 번역하는 코루틴 함수
+        """
+        loop = asyncio.get_running_loop()
+        results = [None] * len(sents)
+        missing = []  # LRU에 없는 (인덱스, 키)
+        for i, sent in enumerate(sents):
+            key = (prompt, normalize(sent))
+            target = self._get_cached(key)
+            if target is not None:
+                results[i] = target
+            else:
+                missing.append((i, key))
+
+        if missing and self._db is not None:
+            # LRU에 없는 문장은 SQLite에서 한 번에 조회 (이미 번역 중인 문장은 조회하지 않음)
+            sources = list(dict.fromkeys(key[1] for _, key in missing if key not in self._inflight))
+            if sources:
+                found = self._remember_loaded(prompt, await asyncio.to_thread(self._load, prompt, sources))
+                remaining = []
+                for i, key in missing:
+                    if key[1] in found:
+                        results[i] = found[key[1]]
+                        self.disk_hits += 1
+                    else:
+                        remaining.append((i, key))
+                missing = remaining
+
+        waiting = []
+        owned = {}
+        for i, key in missing:
+            sent = sents[i]
+            future = self._inflight.get(key)
+            if future is None:
+                # 처음 보는 문장은 이 요청이 번역을 맡음
+                future = loop.create_future()
+                future.add_done_callback(_consume)
+                self._inflight[key] = future
+                owned[key] = sent.strip()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+            waiting.append((i, future))
+
+        if owned:
+            # 요청이 중간에 끊겨도 같은 문장을 기다리는 다른 요청을 위해 번역은 계속 진행
+            asyncio.ensure_future(self._fill(prompt, owned, translate_fn))
+        for i, future in waiting:
+            results[i] = await asyncio.shield(future)
+        return results
+
+    async def _fill(self, prompt, owned, translate_fn):
+        keys = list(owned.keys())
+        sents = list(owned.values())
+        try:
+            targets = await translate_fn([prompt + sent for sent in sents])
+        except BaseException as e:
+            for key in keys:
+                future = self._inflight.pop(key)
+                if isinstance(e, asyncio.CancelledError):
+                    future.cancel()
+                else:
+                    future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+            return
+        rows = self._put_cached(prompt, sents, targets)
+        for key, target in zip(keys, targets):
+            self._inflight.pop(key).set_result(target)
+        if self._db is not None:
+            # 기다리는 요청에 결과를 먼저 돌려준 뒤 별도 스레드에서 저장
+            try:
+                await asyncio.to_thread(self._store, rows)
+            except Exception:
+                logger.exception("번역 메모리를 저장하지 못했습니다.")
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses + self.coalesced
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'hit_rate': (lookups - self.misses) / lookups if lookups else 0.0,
+            'size': len(self._cache),
+        }
+
+
+def _consume(future):
+    # 기다리는 요청이 없을 때 처리되지 않은 예외 경고가 남지 않도록 함
+    if not future.cancelled():
+        future.exception()